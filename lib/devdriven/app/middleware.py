@@ -15,7 +15,9 @@ This is inspired Python WSGI and Ruby Rack.
 # ## Imports
 
 # +
-from typing import Any, MutableMapping, Tuple, Iterable, Callable
+from typing import Any, IO, MutableMapping, Tuple, Iterable, Callable, TypeGuard
+from contextvars import ContextVar
+import itertools
 import json
 import re
 import sys
@@ -113,19 +115,25 @@ def capture_exception(app: App, status=500, cls=Exception, with_backtrace=False)
             return app(req)
         # pylint: disable-next=broad-exception-caught,broad-except
         except cls as exc:
-            trb = exc.__traceback__
-            trb_extracted = traceback.extract_tb(trb)
-            backtrace = [f"{frame.filename}: {frame.lineno}" for frame in trb_extracted]
-            req["exception"] = exc
-            req["exception.backtrace"] = backtrace
-            body = [f"ERROR: {exc!r}\n"]
-            if with_backtrace:
-                body.extend([frame + "\n" for frame in backtrace])
-            return status, {"Content-Type": "text/plain"}, body
+            return exception_response(req, exc, status, with_backtrace)
 
     return _capture_exception
 
 
+def exception_response(
+    req: Req, exc: BaseException, status: Status, with_backtrace: bool
+) -> Res:
+    "Records exc in req and returns a text/plain error document."
+    trb_extracted = traceback.extract_tb(exc.__traceback__)
+    backtrace = [f"{frame.filename}: {frame.lineno}" for frame in trb_extracted]
+    req["exception"] = exc
+    req["exception.backtrace"] = backtrace
+    body = [f"ERROR: {exc!r}\n"]
+    if with_backtrace:
+        body.extend([frame + "\n" for frame in backtrace])
+    return status, {"Content-Type": "text/plain"}, body
+
+
 # -
 
 # #### Tracing
@@ -134,9 +142,29 @@ def capture_exception(app: App, status=500, cls=Exception, with_backtrace=False)
 # +
 def trace(app: App, ident="", stream=sys.stderr) -> App:
     "Traces requests and responses."
+    log, prnt = trace_writers(ident, stream)
+
+    def _trace(req: Req) -> Res:
+        log(">>>")
+        token = TRACE_INDENT.set(TRACE_INDENT.get() + 1)
+        try:
+            prnt(req)
+            result = app(req)
+            log("...")
+            prnt(result)
+        finally:
+            TRACE_INDENT.reset(token)
+        log("<<<")
+        return result
+
+    return _trace
+
+
+def trace_writers(ident: str, stream: IO) -> Tuple[Callable, Callable]:
+    "Returns log(msg) and prnt(data): indented by TRACE_INDENT."
 
     def indent(msg):
-        stream.write(f"{'  ' * TRACE_INDENT[0]}{msg}")
+        stream.write(f"{'  ' * TRACE_INDENT.get()}{msg}")
 
     def log(msg):
         indent(f" #{msg} {ident}\n")
@@ -145,21 +173,11 @@ def trace(app: App, ident="", stream=sys.stderr) -> App:
         indent("")
         pprint(data, stream=stream)
 
-    def _trace(req: Req) -> Res:
-        log(">>>")
-        TRACE_INDENT[0] += 1
-        prnt(req)
-        result = app(req)
-        log("...")
-        prnt(result)
-        TRACE_INDENT[0] -= 1
-        log("<<<")
-        return result
-
-    return _trace
+    return log, prnt
 
 
-TRACE_INDENT = [0]
+# Per thread and per task: concurrent requests do not share the indent.
+TRACE_INDENT: ContextVar[int] = ContextVar("TRACE_INDENT", default=0)
 # -
 
 # ## Reading Input, Writing Output
@@ -211,7 +229,10 @@ def write_output(app: App) -> App:
 
 # +
 def http_response(app: App) -> App:
-    "Generates an HTTP response, emulating a web server."
+    """
+    Generates an HTTP response, emulating a web server.
+    Chunked bodies are framed and sent as they are iterated.
+    """
 
     def _http_response(req: Req) -> Res:
         status, headers, body = app(req)
@@ -219,12 +240,24 @@ def http_response(app: App) -> App:
         for k, v in headers.items():
             out.append(f"{k}: {v}\n")
         out.append("\n")
+        if headers.get("Transfer-Encoding") == "chunked":
+            return status, headers, itertools.chain(out, http_chunks(body))
         out.extend(body)
         return status, headers, out
 
     return _http_response
 
 
+def http_chunks(body: Body) -> Iterable:
+    "Frames each item of body as an HTTP/1.1 chunk, sized in bytes."
+    for item in body:
+        if item:
+            yield f"{item_length(item):x}\r\n"
+            yield item
+            yield "\r\n"
+    yield "0\r\n\r\n"
+
+
 # -
 
 
@@ -269,40 +302,59 @@ def decode_content(app: App, decoder: Decoder, content_types=None, strict=False)
     """
 
     def _decode_content(req: Req) -> Res:
-        req["input.data"] = decoder(req["input.content"])
-        content_type = req.get("Content-Type")
-        if strict and content_types and content_type not in content_types:
-            msg = f"Unexpected Content-Type {content_type!r} : expected: {content_types!r} : "
-            return 400, {"Content-Type": "text/plain"}, (msg,)
-        return app(req)
+        return decode_req(req, decoder, content_types, strict) or app(req)
 
     return _decode_content
 
 
+def decode_req(
+    req: Req, decoder: Decoder, content_types=None, strict=False
+) -> Res | None:
+    "Sets input.data.  Returns a 400 response if Content-Type is not expected."
+    req["input.data"] = decoder(req["input.content"])
+    content_type = req.get("Content-Type")
+    if strict and content_types and content_type not in content_types:
+        msg = (
+            f"Unexpected Content-Type {content_type!r} : expected: {content_types!r} : "
+        )
+        return 400, {"Content-Type": "text/plain"}, (msg,)
+    return None
+
+
 # -
 
 
 # +
 def encode_content(app: App, encoder: Encoder, content_type: str) -> App:
-    "Combinator encodes body with encoder.  Sets Content-Type."
+    """
+    Combinator encodes body with encoder.  Sets Content-Type.
+    Lazy bodies are encoded as they are iterated: see set_length.
+    """
 
     def _encode_content(req: Req) -> Res:
         status, headers, body = app(req)
-        if not body:
-            content = encoder(headers.pop("output.data"))
-        else:
-            content = "".join(map(encoder, body))
-        headers.update(
-            {
-                "Content-Type": content_type,
-                "Content-Length": len(content),
-            }
-        )
-        return status, headers, (content,)
+        headers["Content-Type"] = content_type
+        return status, headers, encode_body(headers, body, encoder)
 
     return _encode_content
 
 
+def encode_body(headers: Headers, body: Any, encoder: Encoder, lazy=map) -> Any:
+    """
+    Encodes output.data for an empty body, or each item of body.
+    Lazy bodies are encoded with lazy(encoder, body) as they are iterated.
+    Sets Content-Length or Transfer-Encoding: see set_length.
+    """
+    if not body:
+        body = (encoder(headers.pop("output.data")),)
+    elif is_sized_body(body):
+        body = ("".join(map(encoder, body)),)
+    else:
+        body = lazy(encoder, body)
+    set_length(headers, body)
+    return body
+
+
 # -
 
 
@@ -312,22 +364,31 @@ def encode_content(app: App, encoder: Encoder, content_type: str) -> App:
 # +
 def decode_json(app: App, **kwargs) -> App:
     "Decodes JSON content."
-
-    def _decode_json(content: Content) -> Any:
-        return json.loads(content, **kwargs)
-
     return decode_content(
-        app, _decode_json, content_types={"application/json", "text/plain"}, strict=True
+        app, json_decoder(**kwargs), content_types=JSON_CONTENT_TYPES, strict=True
     )
 
 
 def encode_json(app: App, **kwargs) -> App:
     "Encodes data as JSON."
+    return encode_content(app, json_encoder(**kwargs), content_type="application/json")
+
 
+def json_decoder(**kwargs) -> Decoder:
+    def _decode_json(content: Content) -> Any:
+        return json.loads(content, **kwargs)
+
+    return _decode_json
+
+
+def json_encoder(**kwargs) -> Encoder:
     def _encode_json(data: Data) -> Content:
         return json.dumps(data, **kwargs) + "\n"
 
-    return encode_content(app, _encode_json, content_type="application/json")
+    return _encode_json
+
+
+JSON_CONTENT_TYPES = {"application/json", "text/plain"}
 
 
 # -
@@ -344,6 +405,21 @@ def decode_yaml(app: App, **kwargs) -> App:
     otherwise expect only one document.
     """
 
+    return decode_content(
+        app, yaml_decoder(**kwargs), content_types=YAML_CONTENT_TYPES, strict=True
+    )
+
+
+def encode_yaml(app: App, **kwargs) -> App:
+    """
+    Encodes data as YAML.
+    Note: this includes the "..." end of document footer.
+    """
+    return encode_content(app, yaml_encoder(**kwargs), content_type="application/yaml")
+
+
+def yaml_decoder(**kwargs) -> Decoder:
+    "See decode_yaml."
     kwargs = {"Loader": yaml.FullLoader} | kwargs
     multiple_documents = kwargs.get("multiple_documents", False) is not False
 
@@ -354,24 +430,17 @@ def decode_yaml(app: App, **kwargs) -> App:
         assert len(documents) == 1
         return documents[0]
 
-    return decode_content(
-        app,
-        _decode_yaml,
-        content_types={"application/yaml", "text/yaml", "text/plain"},
-        strict=True,
-    )
+    return _decode_yaml
 
 
-def encode_yaml(app: App, **kwargs) -> App:
-    """
-    Encodes data as YAML.
-    Note: this includes the "..." end of document footer.
-    """
-
+def yaml_encoder(**kwargs) -> Encoder:
     def _encode_yaml(data: Data) -> Content:
         return yaml.dump(data, **kwargs)
 
-    return encode_content(app, _encode_yaml, content_type="application/yaml")
+    return _encode_yaml
+
+
+YAML_CONTENT_TYPES = {"application/yaml", "text/yaml", "text/plain"}
 
 
 # -
@@ -381,14 +450,41 @@ def encode_yaml(app: App, **kwargs) -> App:
 
 
 def content_length(app: App) -> App:
+    "Sets Content-Length or Transfer-Encoding: see set_length."
+
     def _content_length(req: Req) -> Res:
         status, headers, body = app(req)
-        headers["Content-Length"] = sum(map(len, body))
+        set_length(headers, body)
         return status, headers, body
 
     return _content_length
 
 
+def set_length(headers: Headers, body: Any) -> None:
+    """
+    Sets Content-Length for sized bodies.
+    Otherwise the length is unknown until body is iterated: use chunked Transfer-Encoding.
+    """
+    if is_sized_body(body):
+        headers.pop("Transfer-Encoding", None)
+        headers["Content-Length"] = sum(map(item_length, body))
+    else:
+        headers.pop("Content-Length", None)
+        headers["Transfer-Encoding"] = "chunked"
+
+
+def is_sized_body(body: Any) -> TypeGuard[list | tuple]:
+    "Bodies with a known length before iteration."
+    return isinstance(body, (list, tuple))
+
+
+def item_length(item: Any) -> int:
+    "Length of a body item in bytes: str items are sent as UTF-8."
+    if isinstance(item, str):
+        return len(item.encode("utf-8"))
+    return len(item)
+
+
 # # Injection
 
 
@@ -0,0 +1,347 @@
+"""
+# # Async Application Middleware
+
+The async variant of the middleware protocol:
+an "AsyncApp" is a coroutine function with a single "request" argument.
+It returns a response: a status code, headers, body.
+A body is an AsyncIterable or an Iterable.
+Combinators create new AsyncApps by wrapping others, as in middleware.
+
+Adapters:
+* to_async: runs a sync App in a bounded thread pool.
+* asgi: runs an AsyncApp as an ASGI 3 application, e.g. under uvicorn.
+
+"""
+
+# ## Imports
+
+# +
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Tuple,
+)
+import asyncio
+import functools
+import sys
+from concurrent.futures import Executor, ThreadPoolExecutor
+from .middleware import (
+    App,
+    Req,
+    Status,
+    Headers,
+    Encoder,
+    Decoder,
+    JSON_CONTENT_TYPES,
+    YAML_CONTENT_TYPES,
+    TRACE_INDENT,
+    decode_req,
+    encode_body,
+    exception_response,
+    header_key,
+    json_decoder,
+    json_encoder,
+    set_length,
+    trace_writers,
+    yaml_decoder,
+    yaml_encoder,
+)
+
+# -
+
+# ### Protocol Types
+
+AsyncBody = AsyncIterable | Iterable
+AsyncRes = Tuple[Status, Headers, AsyncBody]
+AsyncApp = Callable[[Req], Awaitable[AsyncRes]]
+
+
+# ## Bodies
+
+
+# +
+async def aiter_body(body: AsyncBody) -> AsyncIterator:
+    "Iterates over an async or sync body."
+    if isinstance(body, AsyncIterable):
+        async for item in body:
+            yield item
+    else:
+        for item in body:
+            yield item
+
+
+async def read_body(body: AsyncBody) -> list:
+    "Returns all items of body."
+    if isinstance(body, (list, tuple)):
+        return list(body)
+    return [item async for item in aiter_body(body)]
+
+
+async def amap(fun: Callable, body: AsyncBody) -> AsyncIterator:
+    "fun(item) for each item of an async or sync body."
+    async for item in aiter_body(body):
+        yield fun(item)
+
+
+# -
+
+# ## Thread Pool Adapter
+
+# Sync apps and sync body iterators can block: they run in a bounded thread pool.
+
+# +
+THREAD_POOL_SIZE = 8
+
+
+@functools.cache
+def thread_pool() -> Executor:
+    "The shared thread pool: THREAD_POOL_SIZE workers."
+    return ThreadPoolExecutor(
+        max_workers=THREAD_POOL_SIZE, thread_name_prefix="middleware"
+    )
+
+
+def to_async(app: App, executor: Executor | None = None) -> AsyncApp:
+    """
+    Runs a sync App in executor, default: thread_pool().
+    Lazy bodies are iterated in executor.
+    """
+
+    async def _to_async(req: Req) -> AsyncRes:
+        pool = executor or thread_pool()
+        loop = asyncio.get_running_loop()
+        status, headers, body = await loop.run_in_executor(pool, app, req)
+        res_body: AsyncBody = body
+        if not isinstance(body, (list, tuple, str, bytes)):
+            res_body = iterate_in_executor(body, pool)
+        return status, headers, res_body
+
+    return _to_async
+
+
+async def iterate_in_executor(body: Iterable, executor: Executor) -> AsyncIterator:
+    loop = asyncio.get_running_loop()
+    items = iter(body)
+    while (item := await loop.run_in_executor(executor, next, items, END)) is not END:
+        yield item
+
+
+END = object()
+# -
+
+
+# #### Exception Handling
+
+
+# +
+def capture_exception(
+    app: AsyncApp, status=500, cls=Exception, with_backtrace=False
+) -> AsyncApp:
+    "Captures an exception w/ backtrace and creates a text/plain error document."
+
+    async def _capture_exception(req: Req) -> AsyncRes:
+        try:
+            return await app(req)
+        # pylint: disable-next=broad-exception-caught,broad-except
+        except cls as exc:
+            return exception_response(req, exc, status, with_backtrace)
+
+    return _capture_exception
+
+
+# -
+
+# #### Tracing
+
+
+# +
+def trace(app: AsyncApp, ident="", stream=sys.stderr) -> AsyncApp:
+    "Traces requests and responses."
+    log, prnt = trace_writers(ident, stream)
+
+    async def _trace(req: Req) -> AsyncRes:
+        log(">>>")
+        token = TRACE_INDENT.set(TRACE_INDENT.get() + 1)
+        try:
+            prnt(req)
+            result = await app(req)
+            log("...")
+            prnt(result)
+        finally:
+            TRACE_INDENT.reset(token)
+        log("<<<")
+        return result
+
+    return _trace
+
+
+# -
+
+
+# ## Decoding Inputs, Encoding Outputs
+
+
+# +
+def decode_content(
+    app: AsyncApp, decoder: Decoder, content_types=None, strict=False
+) -> AsyncApp:
+    """
+    Combinator decodes body with decoder(input.content) for content_types.
+    If strict and Content-Type is not expected, return 400.
+    """
+
+    async def _decode_content(req: Req) -> AsyncRes:
+        return decode_req(req, decoder, content_types, strict) or await app(req)
+
+    return _decode_content
+
+
+def encode_content(app: AsyncApp, encoder: Encoder, content_type: str) -> AsyncApp:
+    """
+    Combinator encodes body with encoder.  Sets Content-Type.
+    See middleware.encode_body.
+    """
+
+    async def _encode_content(req: Req) -> AsyncRes:
+        status, headers, body = await app(req)
+        headers["Content-Type"] = content_type
+        return status, headers, encode_body(headers, body, encoder, lazy=amap)
+
+    return _encode_content
+
+
+# -
+
+
+# ## Decode JSON, Encode JSON
+
+
+# +
+def decode_json(app: AsyncApp, **kwargs) -> AsyncApp:
+    "Decodes JSON content."
+    return decode_content(
+        app, json_decoder(**kwargs), content_types=JSON_CONTENT_TYPES, strict=True
+    )
+
+
+def encode_json(app: AsyncApp, **kwargs) -> AsyncApp:
+    "Encodes data as JSON."
+    return encode_content(app, json_encoder(**kwargs), content_type="application/json")
+
+
+# -
+
+# ## Decode YAML, Encode YAML
+
+
+# +
+def decode_yaml(app: AsyncApp, **kwargs) -> AsyncApp:
+    "Decodes YAML content.  See middleware.decode_yaml."
+    return decode_content(
+        app, yaml_decoder(**kwargs), content_types=YAML_CONTENT_TYPES, strict=True
+    )
+
+
+def encode_yaml(app: AsyncApp, **kwargs) -> AsyncApp:
+    "Encodes data as YAML."
+    return encode_content(app, yaml_encoder(**kwargs), content_type="application/yaml")
+
+
+# -
+
+
+# ## Header Management
+
+
+def content_length(app: AsyncApp) -> AsyncApp:
+    "Sets Content-Length or Transfer-Encoding: see middleware.set_length."
+
+    async def _content_length(req: Req) -> AsyncRes:
+        status, headers, body = await app(req)
+        set_length(headers, body)
+        return status, headers, body
+
+    return _content_length
+
+
+# ## ASGI Adapter
+
+
+# +
+def asgi(app: AsyncApp) -> Callable:
+    """
+    Returns an ASGI 3 application for app.
+    The request has the ASGI "scope", "Request-Method", "Path-Info", "Query-String",
+    headers as "A-Key-Word" and the request body as "input.content".
+    Body items are sent as they are produced.
+    """
+
+    async def _asgi(scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await asgi_lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"asgi: unsupported scope type: {scope['type']!r}")
+        req = asgi_req(scope)
+        req["input.content"] = (await asgi_read(receive)).decode("utf-8")
+        status, headers, body = await app(req)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (str(k).lower().encode("latin-1"), str(v).encode("latin-1"))
+                    for k, v in headers.items()
+                ],
+            }
+        )
+        async for item in aiter_body(body):
+            if isinstance(item, str):
+                item = item.encode("utf-8")
+            if item:
+                await send(
+                    {"type": "http.response.body", "body": item, "more_body": True}
+                )
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    return _asgi
+
+
+def asgi_req(scope: dict) -> Req:
+    req: Req = {
+        "asgi.scope": scope,
+        "Request-Method": scope.get("method", "GET"),
+        "Path-Info": scope.get("path", ""),
+        "Query-String": scope.get("query_string", b"").decode("latin-1"),
+    }
+    for k, v in scope.get("headers", ()):
+        req[header_key(k.decode("latin-1").lower())] = v.decode("latin-1")
+    return req
+
+
+async def asgi_read(receive: Callable) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def asgi_lifespan(receive: Callable, send: Callable) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+# -
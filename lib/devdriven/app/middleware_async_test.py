@@ -0,0 +1,119 @@
+import asyncio
+from io import StringIO
+import threading
+from . import middleware_async as sut
+
+
+async def something_useful_app(req: sut.Req) -> sut.AsyncRes:
+    x, y = req["input.data"]
+    return 200, {}, (x * y,)
+
+
+def test_full_stack():
+    app = something_useful_app
+    app = sut.trace(app, stream=StringIO())
+    app = sut.decode_json(app)
+    app = sut.encode_json(app)
+    app = sut.content_length(app)
+    req = {"input.content": '["ab", 2]', "Content-Type": "application/json"}
+    status, headers, body = asyncio.run(app(req))
+    assert status == 200
+    assert headers == {"Content-Type": "application/json", "Content-Length": 7}
+    assert body == ('"abab"\n',)
+
+
+def test_encode_lazy_body():
+    async def records_app(_req):
+        async def records():
+            for i in range(3):
+                yield {"i": i}
+
+        return 200, {}, records()
+
+    app = sut.content_length(sut.encode_json(records_app))
+    status, headers, body = asyncio.run(app({}))
+    assert status == 200
+    assert headers == {
+        "Content-Type": "application/json",
+        "Transfer-Encoding": "chunked",
+    }
+    assert asyncio.run(sut.read_body(body)) == [
+        '{"i": 0}\n',
+        '{"i": 1}\n',
+        '{"i": 2}\n',
+    ]
+
+
+def test_to_async():
+    threads = set()
+
+    def sync_app(req):
+        threads.add(threading.current_thread())
+
+        def body():
+            threads.add(threading.current_thread())
+            yield from req["input.content"].split(",")
+
+        return 201, {"X": "y"}, body()
+
+    async def run():
+        status, headers, body = await sut.to_async(sync_app)({"input.content": "a,b"})
+        return status, headers, await sut.read_body(body)
+
+    assert asyncio.run(run()) == (201, {"X": "y"}, ["a", "b"])
+    assert threading.current_thread() not in threads
+    assert sut.thread_pool() is sut.thread_pool()
+
+
+def test_capture_exception():
+    async def failing_app(_req):
+        raise ValueError("failing_app")
+
+    app = sut.capture_exception(failing_app, status=599)
+    req = {}
+    status, headers, body = asyncio.run(app(req))
+    assert repr(req["exception"]) == "ValueError('failing_app')"
+    assert status == 599
+    assert headers["Content-Type"] == "text/plain"
+    assert body == ["ERROR: ValueError('failing_app')\n"]
+
+
+def test_asgi():
+    async def echo_app(req):
+        async def body():
+            yield f"{req['Request-Method']} {req['Path-Info']}?{req['Query-String']}\n"
+            yield ""
+            yield req["input.content"].encode("utf-8")
+
+        return 200, {"Content-Type": req["Content-Type"]}, body()
+
+    received = [
+        {"type": "http.request", "body": b"\xc3\xa9", "more_body": True},
+        {"type": "http.request", "body": b"!", "more_body": False},
+    ]
+    sent = []
+
+    async def receive():
+        return received.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/echo",
+        "query_string": b"a=1",
+        "headers": [(b"content-type", b"text/plain")],
+    }
+    asyncio.run(sut.asgi(echo_app)(scope, receive, send))
+    assert sent == [
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain")],
+        },
+        {"type": "http.response.body", "body": b"POST /echo?a=1\n", "more_body": True},
+        {"type": "http.response.body", "body": b"\xc3\xa9!", "more_body": True},
+        {"type": "http.response.body", "body": b"", "more_body": False},
+    ]
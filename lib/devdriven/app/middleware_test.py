@@ -107,3 +107,53 @@ def test_capture_exception():
     assert body[0] == f"ERROR: {exc!r}\n"
     assert re.search(r"middleware.py: \d+\n$", body[1])
     assert re.search(f"{__file__}: \\d+\n$", body[2])
+
+
+def test_streaming_body():
+    output_stream = StringIO("")
+
+    def records_app(_req):
+        for i in range(2):
+            # Earlier records are written before later ones are produced:
+            assert output_stream.getvalue().count('{"i": ') == i
+            yield {"i": i}
+
+    def lazy_app(req):
+        return 200, {}, records_app(req)
+
+    app = lazy_app
+    app = sut.encode_json(app)
+    app = sut.content_length(app)
+    app = sut.http_response(app)
+    app = sut.write_output(app)
+    status, headers, _body = app({"output.stream": output_stream})
+    assert status == 200
+    assert headers == {
+        "Content-Type": "application/json",
+        "Transfer-Encoding": "chunked",
+    }
+    assert output_stream.getvalue() == (
+        "HTTP/1.1 200 OK\n"
+        "Content-Type: application/json\n"
+        "Transfer-Encoding: chunked\n"
+        "\n"
+        '9\r\n{"i": 0}\n\r\n'
+        '9\r\n{"i": 1}\n\r\n'
+        "0\r\n\r\n"
+    )
+
+
+def test_length_in_bytes():
+    body = ["caf\u00e9", b"\xc3\xa9"]
+    headers: dict = {}
+    sut.set_length(headers, body)
+    assert headers == {"Content-Length": 7}
+    assert list(sut.http_chunks(iter(body))) == [
+        "5\r\n",
+        "caf\u00e9",
+        "\r\n",
+        "2\r\n",
+        b"\xc3\xa9",
+        "\r\n",
+        "0\r\n\r\n",
+    ]
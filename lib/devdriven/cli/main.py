@@ -1,7 +1,6 @@
 #!/usr/bin/env python3.11
 from typing import Any, Self, Tuple, List, Dict, IO, NoReturn
 import logging as log
-import json
 import re
 import sys
 from pathlib import Path
@@ -9,7 +8,7 @@ from datetime import datetime
 import urllib3
 from .types import Argv
 from ..util import not_implemented
-from ..to_dict import to_dict
+from ..to_dict import to_dict, write_json
 from .command import Command
 
 
@@ -130,8 +129,7 @@ class Main:
         return {"errors": errors, "result": result}
 
     def emit_output(self, output: Any) -> Any:
-        output = to_dict(output)
-        json.dump(output, fp=self.output_file(), indent=2)
+        write_json(output, self.output_file(), indent=2)
         return output
 
     def output_file(self) -> IO:
@@ -1,13 +1,15 @@
-from typing import Any, Union, Iterable, Callable, Type
+from typing import Any, Union, Iterable, Iterator, Callable, Type
 from dataclasses import dataclass, field
 import json
 import yaml  # type: ignore
 import pandas as pd  # type: ignore
-from .util import splitkeep  # type: ignore
+from .util import splitkeep, isplitkeep, isplitkeep_view  # type: ignore
 
 JSON = "json"
 YAML = "yaml"
 TYPE = type(int)
+# Converter.records:
+DATAFRAME_CHUNK_ROWS = 10000
 
 
 def identity(data: Any) -> Any:
@@ -20,6 +22,13 @@ class Converter:
     record_separator: str = field(default="\n")
     rich_format: str = field(default=JSON)
     preprocess_func: Callable | None = field(default=identity)
+    # If True, as_iterable splits str and bytes lazily.  See isplitkeep.
+    lazy: bool = field(default=False)
+
+    # as_type functions by name: see as_type_fun.
+    _as_type_funs: dict = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     def cannot_convert(self, msg: str, data: Any):
         raise TypeError(f"{msg}: cannot convert {type(data).__name__!r}")
@@ -27,24 +36,52 @@ class Converter:
     def as_type(self, data: Any, typ: Union[str, Type, None], *args):
         if typ is None:
             return data
+        return self.as_type_fun(typ)(data, *args)
+
+    def as_type_fun(self, typ: Union[str, Type, None]) -> Callable:
+        "Returns fun(data, *args) converting to typ: a registered function or self.as_<typ>."
+        if typ is None:
+            return identity
+        try:
+            return self._as_type_funs[typ]
+        except KeyError:
+            pass
+        name = typ.__name__ if isinstance(typ, TYPE) else typ
+        fun: Callable | None = self._as_type_funs.get(name) or getattr(
+            self, f"as_{name}", None
+        )
+        if fun is None:
+
+            def fun(data: Any, *_args) -> Any:
+                self.cannot_convert(f"as_type: {typ!r}", data)
+
+        self._as_type_funs[typ] = fun
+        return fun
+
+    def register(self, typ: Union[str, Type], fun: Callable) -> Callable:
+        "Registers fun(data, *args) for as_type(data, typ, *args)."
+        self._as_type_funs[typ] = fun
         if isinstance(typ, TYPE):
-            typ = typ.__name__
-        fun: Callable | None = getattr(self, f"as_{typ}", None)
-        if fun is not None:
-            return fun(data, *args)
-        self.cannot_convert("as_type: {typ!r}", data)
-        return None
+            self._as_type_funs[typ.__name__] = fun
+        return fun
 
     def as_bytes(self, data: Any) -> bytes:
         if isinstance(data, bytes):
             return data
+        if isinstance(data, (bytearray, memoryview)):
+            return bytes(data)
         return self.as_str(data).encode(self.encoding)
 
+    def as_memoryview(self, data: Any) -> memoryview:
+        if isinstance(data, memoryview):
+            return data
+        return memoryview(self.as_bytes(data))
+
     def as_str(self, data: Any) -> str:
         if isinstance(data, str):
             return data
-        if isinstance(data, bytes):
-            return data.decode(self.encoding)
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return str(data, self.encoding)
         if isinstance(data, (int, float)):
             return str(data)
         if isinstance(data, pd.DataFrame):
@@ -68,63 +105,80 @@ class Converter:
     def as_iterable(self, data: Any, elem_type: str | None = None) -> Iterable:
         if isinstance(data, str):
             if elem_type == "str":
-                return splitkeep(data, self.record_separator)
-            if elem_type == "bytes":
-                data = data.encode(self.encoding)
-                return splitkeep(data, self.record_separator.encode(self.encoding))
+                return self.split(data, self.record_separator)
+            if elem_type in ("bytes", "memoryview"):
+                return self.as_iterable(data.encode(self.encoding), elem_type)
             return self.as_iterable(self.as_str(data), "str")
         if isinstance(data, bytes):
             if elem_type == "bytes":
-                return splitkeep(data, self.record_separator.encode(self.encoding))
+                return self.split(data, self.record_separator.encode(self.encoding))
+            if elem_type == "memoryview":
+                sep = self.record_separator.encode(self.encoding)
+                return isplitkeep_view(data, sep)
             if elem_type == "str":
                 return self.as_iterable(self.as_str(data), elem_type)
             return [self.as_type(data, elem_type)]
         if isinstance(data, list):
             if elem_type is None:
                 return data
-            return [self.as_type(elem, elem_type) for elem in data]
+            fun = self.as_type_fun(elem_type)
+            return [fun(elem) for elem in data]
         if isinstance(data, tuple):
             if elem_type is None:
                 return list(data)
-            return [self.as_type(elem, elem_type) for elem in data]
+            fun = self.as_type_fun(elem_type)
+            return [fun(elem) for elem in data]
         if isinstance(data, dict):
             if elem_type is None:
                 return [list(kv) for kv in data.items()]
-            return [self.as_type(elem, elem_type) for elem in data.items()]
+            fun = self.as_type_fun(elem_type)
+            return [fun(elem) for elem in data.items()]
         if isinstance(data, pd.DataFrame):
+            records = self.records(data)
             if elem_type is None:
-                # !!!: convert each DataFrame row into a str:
-                return self.as_iterable(str(data) + "\n", elem_type)
-            return self.as_iterable(str(data) + "\n", elem_type)
+                return records
+            fun = self.as_type_fun(elem_type)
+            return (fun(elem) for elem in records)
         return [self.as_type(data, elem_type)]
 
+    def split(self, data: Any, sep: Any) -> Iterable:
+        if self.lazy:
+            return isplitkeep(data, sep)
+        return splitkeep(data, sep)
+
+    def records(self, data: pd.DataFrame) -> Iterator[dict]:
+        "Yields each row as a dict, converting DATAFRAME_CHUNK_ROWS at a time."
+        for start in range(0, len(data), DATAFRAME_CHUNK_ROWS):
+            chunk = data.iloc[start : start + DATAFRAME_CHUNK_ROWS]
+            yield from chunk.to_dict("records")
+
     def as_dict(
         self, data: Any, key_type: str | None = None, val_type: str | None = None
     ) -> dict:
         if isinstance(data, dict):
             if key_type is None and val_type is None:
                 return data
-            return {
-                self.as_type(k, key_type): self.as_type(v, val_type)
-                for k, v in data.items()
-            }
+            key_fun, val_fun = self.as_type_fun(key_type), self.as_type_fun(val_type)
+            return {key_fun(k): val_fun(v) for k, v in data.items()}
         if isinstance(data, list):
             return self.as_dict(dict(data), key_type, val_type)
         if isinstance(data, tuple):
             return self.as_dict(list(data), key_type, val_type)
         if isinstance(data, pd.DataFrame):
-            return {r[0]: r[1] for _i, r in data.iterrows()}
+            keys, vals = data.iloc[:, 0].tolist(), data.iloc[:, 1].tolist()
+            return self.as_dict(dict(zip(keys, vals)), key_type, val_type)
         self.cannot_convert("as_dict", data)
         return {}
 
     # pylint: disable-next=invalid-name
-    def as_DataFrame(self, data: Any) -> pd.DataFrame | None:
+    def as_DataFrame(self, data: Any, columns: Any = None) -> pd.DataFrame | None:
+        "Lists and tuples of dicts, tuples or scalars are passed to pandas as-is."
         if isinstance(data, pd.DataFrame):
             return data
         if isinstance(data, str):
             return pd.DataFrame(self.as_iterable(data, "str"))
-        if isinstance(data, list):
-            return self.as_DataFrame(self.as_iterable(data, None))
+        if isinstance(data, (list, tuple)):
+            return pd.DataFrame(data, columns=columns)
         if isinstance(data, dict):
             return pd.DataFrame(data=data.items(), columns=["key", "value"])
         if isinstance(data, Iterable):
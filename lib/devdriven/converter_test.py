@@ -1,4 +1,5 @@
 import pandas as pd
+import pytest
 from . import converter as sut
 
 
@@ -113,3 +114,45 @@ def test_as_rich_format_yaml():
 
 def make(**kwargs):
     return sut.Converter(**kwargs)
+
+
+def test_dataframe():
+    obj = make()
+    df = make_dataframe()
+    records = [{"c1": "a", "c2": 3}, {"c1": "b", "c2": 5}]
+    assert list(obj.as_iterable(df, None)) == records
+    assert list(obj.as_iterable(df, "str")) == list(map(obj.as_str, records))
+    assert obj.as_dict(df) == {"a": 3, "b": 5}
+    assert obj.as_dict(df, None, "str") == {"a": "3", "b": "5"}
+    assert obj.as_DataFrame(records).equals(df)
+    assert obj.as_DataFrame([("a", 3), ("b", 5)], ["c1", "c2"]).equals(df)
+    assert obj.as_DataFrame((1, 2)).equals(pd.DataFrame({0: [1, 2]}))
+    assert obj.as_DataFrame(df) is df
+    big = pd.DataFrame({"i": range(sut.DATAFRAME_CHUNK_ROWS * 2 + 1)})
+    assert [row["i"] for row in obj.as_iterable(big)] == list(big["i"])
+
+
+def test_as_iterable_lazy():
+    obj = make(lazy=True)
+    result = obj.as_iterable("abc\ndef", "str")
+    assert not isinstance(result, list)
+    assert list(result) == ["abc\n", "def"]
+    assert list(obj.as_iterable("abc\ndef\n", "bytes")) == [b"abc\n", b"def\n"]
+    assert list(obj.as_iterable(b"abc\ndef\n", "str")) == ["abc\n", "def\n"]
+    views = list(make().as_iterable(b"abc\ndef", "memoryview"))
+    assert all(isinstance(view, memoryview) for view in views)
+    assert [bytes(view) for view in views] == [b"abc\n", b"def"]
+    assert [obj.as_str(view) for view in views] == ["abc\n", "def"]
+    assert obj.as_type("abc", "memoryview") == memoryview(b"abc")
+
+
+def test_register():
+    obj = make()
+    assert obj.as_type("12", int) == 12
+    assert obj.as_type_fun("int") is obj.as_type_fun("int")
+    obj.register(complex, complex)
+    assert obj.as_type("1+2j", complex) == 1 + 2j
+    assert obj.as_iterable(["1", "2j"], "complex") == [1, 2j]
+    assert obj.as_dict({"a": "3"}, None, complex) == {"a": 3}
+    with pytest.raises(TypeError, match="as_type: 'unknown': cannot convert 'str'"):
+        obj.as_type("x", "unknown")
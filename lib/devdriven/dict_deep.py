@@ -1,67 +1,100 @@
-def hash_deep(obj):
-    def mix(a, b):
-        a = a - 1
-        if a < 0:
-            a = -a
-        b = b - 1
-        if b < 0:
-            b = -b
-        return a ^ b
-
-    def hash_deep_seq(obj):
-        val = hash(len(obj))
-        for item in obj:
-            val = mix(hash_deep(item), val)
-        return val
-
-    if f := obj.__hash__:
-        return f()
-    h = hash(obj.__class__.__name__)
+from typing import Any, Dict, Iterator, Iterable, Tuple, MutableMapping, Callable
+
+
+def hash_deep(obj: Any) -> int:
+    """
+    Structural hash of obj:
+    lists, tuples, dicts and sets hash by their contents.
+    Equal structures have equal hashes; dict order is ignored.
+    """
     if isinstance(obj, (list, tuple)):
-        return mix(h, hash_deep_seq(obj))
-    if isinstance(obj, (dict)):
-        return mix(h, hash_deep_seq(obj))
-    return -1
-
-
-hash_deep(123)
-hash_deep(123.45)
-hash_deep(True)
-hash_deep(False)
-hash_deep([])
-hash_deep("a")
-hash_deep(["a"])
-hash_deep((1))
-hash_deep({})
-hash_deep({"a": 1})
-
-
-def dict_deep():
-    d = {}
-
-    def d_get(k):
-        h = hash_deep(k)
-        if bucket := d.get(h):
-            for item in bucket:
-                if item[0] == k:
-                    return item[1]
-        return None
-
-    def d_set(k, v):
-        h = hash_deep(k)
-        if not (bucket := d.get(h)):
-            d[h] = bucket = []
-        for e in bucket:
-            if e[0] == k:
-                e[1] = v
-                return None
-        bucket.append([k, v])
-        return None
+        return hash(tuple(map(hash_deep, obj)))
+    if isinstance(obj, dict):
+        return hash(frozenset((hash(k), hash_deep(v)) for k, v in obj.items()))
+    if isinstance(obj, (set, frozenset)):
+        return hash(frozenset(obj))
+    return hash(obj)
+
+
+class DeepKey:
+    """
+    Wraps a possibly unhashable obj as a dict key.
+    The structural hash is computed once.
+    Keys must not be mutated while in use.
+    """
+
+    __slots__ = ("obj", "hash")
+
+    def __init__(self, obj: Any) -> None:
+        self.obj = obj
+        self.hash = hash_deep(obj)
+
+    def __hash__(self) -> int:
+        return self.hash
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, DeepKey):
+            return NotImplemented
+        return self.hash == other.hash and self.obj == other.obj
+
+    def __repr__(self) -> str:
+        return f"DeepKey({self.obj!r})"
+
+
+class DeepDict(MutableMapping):
+    """
+    A mapping keyed by structure: e.g. JSON-like nested lists and dicts.
+    """
+
+    def __init__(self, items: Iterable[Tuple[Any, Any]] | None = None) -> None:
+        self._data: Dict[DeepKey, Tuple[Any, Any]] = {}
+        if items:
+            self.update(items)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._data[DeepKey(key)][1]
+
+    def __setitem__(self, key: Any, val: Any) -> None:
+        self._data[DeepKey(key)] = (key, val)
+
+    def __delitem__(self, key: Any) -> None:
+        del self._data[DeepKey(key)]
+
+    def __contains__(self, key: Any) -> bool:
+        return DeepKey(key) in self._data
+
+    def __iter__(self) -> Iterator[Any]:
+        return (item[0] for item in self._data.values())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"DeepDict({list(self.items())!r})"
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if item := self._data.get(DeepKey(key)):
+            return item[1]
+        return default
+
+    def items(self) -> Any:
+        return self._data.values()
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+def dict_deep() -> Callable:
+    """
+    Returns g(k) to get and g(k, v) to set a value for k.
+    See DeepDict.
+    """
+    d = DeepDict()
 
     def g(k, *v):
         if v:
-            d_set(k, v[0])
+            d[k] = v[0]
             return None
-        return d_get(k)
+        return d.get(k)
 
     return g
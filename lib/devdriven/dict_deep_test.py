@@ -0,0 +1,45 @@
+from . import dict_deep as sut
+
+
+def test_hash_deep():
+    fut = sut.hash_deep
+    assert fut(123) == hash(123)
+    assert fut("a") == hash("a")
+    assert fut([]) == fut(())
+    assert fut(["a", [1, {"b": 2}]]) == fut(["a", [1, {"b": 2}]])
+    assert fut({"a": 1, "b": [2]}) == fut({"b": [2], "a": 1})
+    assert fut({1, 2}) == fut({2, 1})
+
+
+def test_deep_dict():
+    d = sut.DeepDict()
+    key = {"a": [1, 2], "b": {"c": None}}
+    d[key] = 1
+    d[[1, 2]] = 2
+    d[(1, 2)] = 3
+    d["x"] = 4
+    assert len(d) == 4
+    assert d[{"b": {"c": None}, "a": [1, 2]}] == 1
+    assert d[[1, 2]] == 2
+    assert d[(1, 2)] == 3
+    assert d.get([1, 3]) is None
+    assert d.get([1, 3], 5) == 5
+    assert [1, 2] in d
+    assert [1, 3] not in d
+    assert list(d) == [key, [1, 2], (1, 2), "x"]
+    assert list(d.items())[0] == (key, 1)
+    d[[1, 2]] = 6
+    assert len(d) == 4
+    assert d[[1, 2]] == 6
+    del d[[1, 2]]
+    assert len(d) == 3
+    assert [1, 2] not in d
+    d.clear()
+    assert len(d) == 0
+
+
+def test_dict_deep():
+    g = sut.dict_deep()
+    assert g([1, {"a": 2}]) is None
+    g([1, {"a": 2}], "v")
+    assert g([1, {"a": 2}]) == "v"
@@ -1,11 +1,14 @@
-from typing import Union, List, Dict
+from typing import IO, Union, List, Dict, Iterable, Iterator, Tuple, Set, Self
 import platform
 import os
-from .util import exec_command
-from .file import file_nlines
+from dataclasses import dataclass
+from .util import exec_pipe, count, run_many
+from .file import file_nlines, file_size, file_md5, hash_files, READ_BUFFER_SIZE
+from .diff_native import read_lines, diff_lines
 
 DiffOption = str
 DiffResult = Dict[str, Union[str, int, float, bool, None]]
+DiffPair = Tuple[str, str]
 
 
 def diff_files(
@@ -25,9 +28,34 @@ def diff_files(
             "correct_percent": 0.0,
             "exit_code": 2,
         }
+    if DIFF_NATIVE and not diff_options and use_native(expected_file, actual_file):
+        if (result := diff_files_native(expected_file, actual_file)) is not None:
+            return result
     return DIFF_FUNC(DIFF_PROG, expected_file, actual_file, *diff_options)
 
 
+def use_native(expected_file: str, actual_file: str) -> bool:
+    "Large files are diffed by streaming the output of diff(1)."
+    sizes = (file_size(expected_file) or 0, file_size(actual_file) or 0)
+    return max(sizes) <= DIFF_NATIVE_MAX_BYTES
+
+
+def diff_files_native(expected_file: str, actual_file: str) -> DiffResult | None:
+    "Returns None if there are more than DIFF_NATIVE_MAX_EDITS differences."
+    if file_size(expected_file) == file_size(actual_file) and file_md5(
+        expected_file
+    ) == file_md5(actual_file):
+        expected = actual = file_nlines(expected_file)
+        return diff_files_stats(expected, actual, 0, 0, 0)
+    a_lines, b_lines = read_lines(expected_file), read_lines(actual_file)
+    edits = diff_lines(a_lines, b_lines, DIFF_NATIVE_MAX_EDITS)
+    if edits is None:
+        return None
+    old = count(edits, lambda edit: edit[0] == "-")
+    new = len(edits) - old
+    return diff_files_stats(len(a_lines), len(b_lines), old, new, 1 if edits else 0)
+
+
 def diff_files_gnu(
     diff_cmd: str, expected_file: str, actual_file: str, *diff_options: DiffOption
 ) -> DiffResult:
@@ -64,23 +92,29 @@ def diff_run(
 ) -> DiffResult:
     expected = file_nlines(expected_file)
     actual = file_nlines(actual_file)
-    diff_result = exec_command(command, check=False, capture_output=True)
-    if diff_result.stderr:
-        raise Exception(
-            f"diff_files: failed : {diff_result.returncode}"
-            f": {command!r} : "
-            f"{diff_result.stderr.decode().splitlines()[:5]!r}"
-        )
     old = new = 0
-    lines = diff_result.stdout.splitlines()
-    if has_fences:
-        lines = [line for line in lines[2:] if not line.startswith(b"@@ ")]
-    for line in lines:
-        if line.startswith(b"-"):
-            old += 1
-        elif line.startswith(b"+"):
-            new += 1
-    return diff_files_stats(expected, actual, old, new, diff_result.returncode)
+
+    def count_lines(stdout: IO[bytes]) -> None:
+        nonlocal old, new
+        lines = iter(stdout)
+        if has_fences:
+            next(lines, None)
+            next(lines, None)
+        for line in lines:
+            if line.startswith(b"-"):
+                old += 1
+            elif line.startswith(b"+"):
+                new += 1
+
+    def count_chunks(stdout: IO[bytes]) -> None:
+        # Output is only "-\n" and "+\n" lines:
+        nonlocal old, new
+        while chunk := stdout.read(READ_BUFFER_SIZE):
+            old += chunk.count(b"-")
+            new += chunk.count(b"+")
+
+    exit_code = exec_pipe(command, count_lines if has_fences else count_chunks)
+    return diff_files_stats(expected, actual, old, new, exit_code)
 
 
 def diff_files_stats(
@@ -128,6 +162,95 @@ def diff_files_stats(
     }
 
 
+#########################################
+# Batches:
+
+
+def diff_many(
+    pairs: Iterable[DiffPair],
+    *diff_options: DiffOption,
+    workers: int | None = None,
+    processes: bool = False,
+    stats: "DiffStats | None" = None,
+) -> Iterator[Tuple[DiffPair, DiffResult]]:
+    """
+    Yields ((expected_file, actual_file), DiffResult) for each pair as it completes.
+    Pairs are diffed on a pool of workers threads, or processes.
+    Identical pairs, by size and hash, are not diffed.
+    If stats is given, each DiffResult is added to it.
+    """
+    pairs = list(pairs)
+    same = identical_pairs(pairs, workers)
+    jobs = [
+        (
+            pair,
+            (diff_same, *pair) if pair in same else (diff_files, *pair, *diff_options),
+        )
+        for pair in pairs
+    ]
+    for pair, result in run_many(jobs, workers, processes):
+        if stats is not None:
+            stats.add(result)
+        yield pair, result
+
+
+def diff_same(expected_file: str, actual_file: str) -> DiffResult:
+    expected = file_nlines(expected_file)
+    actual = file_nlines(actual_file)
+    return diff_files_stats(expected, actual, 0, 0, 0)
+
+
+def identical_pairs(
+    pairs: Iterable[DiffPair], workers: int | None = None
+) -> Set[DiffPair]:
+    "Returns the pairs of files with equal sizes and hashes."
+    sized = [
+        pair
+        for pair in pairs
+        if (size := file_size(pair[0])) is not None and size == file_size(pair[1])
+    ]
+    hashes = hash_files({path for pair in sized for path in pair}, workers=workers)
+    return {
+        pair
+        for pair in sized
+        if hashes[pair[0]] is not None and hashes[pair[0]] == hashes[pair[1]]
+    }
+
+
+@dataclass
+class DiffStats:
+    "Aggregate of many DiffResults."
+
+    count: int = 0
+    correct: int = 0
+    correct_ratio_sum: float = 0.0
+    correct_ratio_min: float | None = None
+    lines_total: int = 0
+    lines_correct: int = 0
+
+    def add(self, result: DiffResult) -> Self:
+        correct_ratio = float(result["correct_ratio"] or 0.0)
+        self.count += 1
+        self.correct += 1 if result["correct"] else 0
+        self.correct_ratio_sum += correct_ratio
+        if self.correct_ratio_min is None or correct_ratio < self.correct_ratio_min:
+            self.correct_ratio_min = correct_ratio
+        total = int(result["expected"] or 0) + int(result["actual"] or 0)
+        self.lines_total += total
+        if (differences := result["differences"]) is not None:
+            self.lines_correct += max(total - int(differences), 0)
+        return self
+
+    @property
+    def correct_ratio_mean(self) -> float:
+        return self.correct_ratio_sum / max(self.count, 1)
+
+    @property
+    def correct_ratio_lines(self) -> float:
+        "Ratio of correct lines over all pairs."
+        return self.lines_correct / max(self.lines_total, 1)
+
+
 if platform.system() == "Darwin":
     if os.path.isfile("/opt/homebrew/bin/diff"):
         DIFF_PROG = "/opt/homebrew/bin/diff"
@@ -141,3 +264,9 @@ else:
     DIFF_PROG = "diff"
     DIFF_FLAVOR = "gnu"
     DIFF_FUNC = diff_files_gnu
+# Opt in: use diff_files_native, unless diff_options are given.
+# Time is O((N+M)D) in Python: slower than diff(1) for many differences.
+# diff(1) is used for large files or many differences.
+DIFF_NATIVE = False
+DIFF_NATIVE_MAX_BYTES = 1024 * 1024
+DIFF_NATIVE_MAX_EDITS = 1000
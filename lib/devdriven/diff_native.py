@@ -0,0 +1,168 @@
+"""
+In-process line diff: Myers' O((N+M)D) algorithm over interned lines.
+Uses the linear space variant: middle snakes, divide and conquer.
+"""
+
+from typing import Any, Hashable, List, Literal, Sequence, Tuple
+
+EditCode = Literal["+", "-"]
+# (code, a_index, b_index):
+#   ("-", i, j): delete a[i].
+#   ("+", i, j): insert b[j].
+Edit = Tuple[EditCode, int, int]
+Lines = List[bytes]
+# A snake: ((x, y), (u, v)): from a[x], b[y] to a[u], b[v].
+Snake = Tuple[Tuple[int, int], Tuple[int, int]]
+
+
+class TooManyEdits(Exception):
+    pass
+
+
+def read_lines(path: str) -> Lines:
+    "Returns the lines of path, split only on b'\\n', with line endings."
+    with open(path, "rb") as input_io:
+        return input_io.readlines()
+
+
+def diff_lines(
+    a: Sequence[Hashable], b: Sequence[Hashable], max_edits: int | None = None
+) -> List[Edit] | None:
+    """
+    Returns a minimal edit script from a to b.
+    Returns None if it has more than max_edits edits.
+    """
+    try:
+        return edit_script(*intern_lines(a, b), max_edits=max_edits)
+    except TooManyEdits:
+        return None
+
+
+def intern_lines(
+    a: Sequence[Hashable], b: Sequence[Hashable]
+) -> Tuple[List[int], List[int]]:
+    "Maps each distinct line to a small int, so comparisons are cheap."
+    ids: dict = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    return a_ids, b_ids
+
+
+def edit_script(
+    a: Sequence[Any], b: Sequence[Any], max_edits: int | None = None
+) -> List[Edit]:
+    "Raises TooManyEdits if the script has more than max_edits edits."
+    edits: List[Edit] = []
+    diff_box(a, 0, len(a), b, 0, len(b), edits, max_edits)
+    if max_edits is not None and len(edits) > max_edits:
+        raise TooManyEdits(f"more than {max_edits} edits")
+    return deletions_first(edits)
+
+
+def deletions_first(edits: List[Edit]) -> List[Edit]:
+    "Orders the deletions of each hunk before its insertions, like diff(1)."
+    result: List[Edit] = []
+    i = j = -1
+    hunk_i = hunk_j = deleted = inserted = 0
+    for code, edit_i, edit_j in edits + [("+", -2, -2)]:
+        if (edit_i, edit_j) != (i, j):
+            result.extend(("-", hunk_i + n, hunk_j) for n in range(deleted))
+            result.extend(("+", hunk_i + deleted, hunk_j + n) for n in range(inserted))
+            hunk_i, hunk_j = i, j = edit_i, edit_j
+            deleted = inserted = 0
+        if code == "-":
+            deleted += 1
+            i += 1
+        else:
+            inserted += 1
+            j += 1
+    return result
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def diff_box(
+    a: Sequence[Any],
+    a_0: int,
+    a_1: int,
+    b: Sequence[Any],
+    b_0: int,
+    b_1: int,
+    edits: List[Edit],
+    max_edits: int | None = None,
+) -> None:
+    "Appends the edits from a[a_0:a_1] to b[b_0:b_1] to edits."
+    while a_0 < a_1 and b_0 < b_1 and a[a_0] == b[b_0]:
+        a_0 += 1
+        b_0 += 1
+    while a_0 < a_1 and b_0 < b_1 and a[a_1 - 1] == b[b_1 - 1]:
+        a_1 -= 1
+        b_1 -= 1
+    if a_0 == a_1:
+        edits.extend(("+", a_0, j) for j in range(b_0, b_1))
+        return
+    if b_0 == b_1:
+        edits.extend(("-", i, b_0) for i in range(a_0, a_1))
+        return
+    # Common ends are trimmed and neither side is empty, so D >= 2:
+    # each box below has a smaller D.
+    (x, y), (u, v) = middle_snake(a, a_0, a_1, b, b_0, b_1, max_edits)
+    diff_box(a, a_0, x, b, b_0, y, edits)
+    diff_box(a, x, u, b, y, v, edits)
+    diff_box(a, u, a_1, b, v, b_1, edits)
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments,too-many-locals,too-many-branches
+def middle_snake(
+    a: Sequence[Any],
+    a_0: int,
+    a_1: int,
+    b: Sequence[Any],
+    b_0: int,
+    b_1: int,
+    max_edits: int | None = None,
+) -> Snake:
+    """
+    Finds the middle snake of a shortest edit path by searching
+    forward from (a_0, b_0) and backward from (a_1, b_1) at once.
+    Keeps only the frontiers: O(N+M) memory.
+    """
+    n, m = a_1 - a_0, b_1 - b_0
+    delta = n - m
+    odd = delta % 2 != 0
+    limit = (n + m + 1) // 2
+    if max_edits is not None:
+        limit = min(limit, (max_edits + 1) // 2)
+    # Frontiers, indexed by diagonal, relative to (a_0, b_0):
+    # forward[k]: furthest x on diagonal k = x - y.
+    # backward[c]: least x on diagonal c + delta.
+    size = 2 * limit + 3
+    forward = [0] * size
+    backward = [n] * size
+    for d in range(limit + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[k - 1] < forward[k + 1]):
+                x = forward[k + 1]
+            else:
+                x = forward[k - 1] + 1
+            y = x - k
+            x_start, y_start = x, y
+            while x < n and y < m and a[a_0 + x] == b[b_0 + y]:
+                x += 1
+                y += 1
+            forward[k] = x
+            if odd and -(d - 1) <= k - delta <= d - 1 and x >= backward[k - delta]:
+                return (a_0 + x_start, b_0 + y_start), (a_0 + x, b_0 + y)
+        for c in range(-d, d + 1, 2):
+            if c == d or (c != -d and backward[c + 1] > backward[c - 1]):
+                x = backward[c - 1]
+            else:
+                x = backward[c + 1] - 1
+            y = x - c - delta
+            x_end, y_end = x, y
+            while x > 0 and y > 0 and a[a_0 + x - 1] == b[b_0 + y - 1]:
+                x -= 1
+                y -= 1
+            backward[c] = x
+            if not odd and -d <= c + delta <= d and x <= forward[c + delta]:
+                return (a_0 + x, b_0 + y), (a_0 + x_end, b_0 + y_end)
+    raise TooManyEdits(f"more than {max_edits} edits")
@@ -0,0 +1,59 @@
+import random
+from . import diff_native as sut
+
+
+def test_diff_lines():
+    fut = sut.diff_lines
+    assert not fut([], [])
+    assert not fut(["a"], ["a"])
+    assert fut([], ["a", "b"]) == [("+", 0, 0), ("+", 0, 1)]
+    assert fut(["a", "b"], []) == [("-", 0, 0), ("-", 1, 0)]
+    assert fut(list("abcabba"), list("cbabac")) == [
+        ("-", 0, 0),
+        ("+", 1, 0),
+        ("-", 2, 2),
+        ("-", 5, 4),
+        ("+", 7, 5),
+    ]
+    assert fut(list("abcd"), list("xbyd")) == [
+        ("-", 0, 0),
+        ("+", 1, 0),
+        ("-", 2, 2),
+        ("+", 3, 2),
+    ]
+
+
+def test_diff_lines_max_edits():
+    fut = sut.diff_lines
+    a, b = [str(i) for i in range(3000)], [str(-i) for i in range(1, 3001)]
+    assert fut(a, b, 100) is None
+    assert fut(list("abcabba"), list("cbabac"), 4) is None
+    assert len(fut(list("abcabba"), list("cbabac"), 5)) == 5
+
+
+def test_diff_lines_minimal():
+    def lcs_len(a, b):
+        prev = [0] * (len(b) + 1)
+        for x in a:
+            curr = [0]
+            for j, y in enumerate(b):
+                curr.append(prev[j] + 1 if x == y else max(prev[j + 1], curr[j]))
+            prev = curr
+        return prev[-1]
+
+    rand = random.Random(123)
+    for _ in range(500):
+        a = [rand.choice("abc") for _ in range(rand.randint(0, 10))]
+        b = [rand.choice("abc") for _ in range(rand.randint(0, 10))]
+        edits = sut.diff_lines(a, b)
+        deleted = {i for code, i, _ in edits if code == "-"}
+        inserted = {j for code, _, j in edits if code == "+"}
+        assert [x for i, x in enumerate(a) if i not in deleted] == [
+            y for j, y in enumerate(b) if j not in inserted
+        ]
+        assert len(edits) == len(a) + len(b) - 2 * lcs_len(a, b)
+
+
+def test_read_lines():
+    assert sut.read_lines("/dev/null") == []
+    assert sut.read_lines("tests/devdriven/data/actual.txt")[:2] == [b"2\n", b"3\n"]
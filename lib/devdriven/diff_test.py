@@ -38,6 +38,13 @@ def test_diff_files():
     assert result == expected
 
 
+def test_diff_files_native():
+    files = ("tests/devdriven/data/expected.txt", "tests/devdriven/data/actual.txt")
+    for a, b in [files, files[::-1], files[:1] * 2, ("/dev/null", files[0])]:
+        assert diff.diff_files_native(a, b) == diff.DIFF_FUNC(diff.DIFF_PROG, a, b)
+        assert diff.diff_files_native(a, b) == diff.diff_files_bsd("diff", a, b)
+
+
 def test_diff_files_non_existant():
     result = diff.diff_files("tests/devdriven/data/expected.txt", "Does-Not-Exist.txt")
     expected = {
@@ -177,3 +184,27 @@ def diff_files_stats(*args):
     result = diff.diff_files_stats(*args)
     # print(f'{repr(args)} -> {repr(result)}')
     return result
+
+
+def test_diff_many():
+    expected_file = "tests/devdriven/data/expected.txt"
+    actual_file = "tests/devdriven/data/actual.txt"
+    pairs = [
+        (expected_file, actual_file),
+        (expected_file, expected_file),
+        (actual_file, "Does-Not-Exist.txt"),
+    ]
+    for processes in (False, True):
+        stats = diff.DiffStats()
+        results = dict(
+            diff.diff_many(pairs, workers=2, processes=processes, stats=stats)
+        )
+        assert results == {pair: diff.diff_files(*pair) for pair in pairs}
+        assert stats.count == 3
+        assert stats.correct == 1
+        assert stats.correct_ratio_min == 0.0
+        assert stats.correct_ratio_mean == (0.6666666666666666 + 1.0) / 3
+        assert stats.lines_total == 21 + 22 + 10
+        assert stats.lines_correct == 14 + 22
+    results = dict(diff.diff_many(pairs[:1], "--minimal", workers=1))
+    assert results[pairs[0]]["differences"] == 7
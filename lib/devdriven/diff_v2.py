@@ -1,14 +1,26 @@
-from typing import Iterable, Literal, List, cast  # Union, Dict, Tuple, cast
+from typing import IO, Iterable, Iterator, Literal, List, Tuple, cast
 import platform
 import os
+import re
 from dataclasses import dataclass
 from functools import cached_property
+from itertools import chain
 from pathlib import Path
-from .util import exec_command, count
+from .util import exec_pipe, count
 from .file import file_nlines, file_md5
+from .diff_native import read_lines, diff_lines
+from .diff import (
+    DiffPair,
+    DiffResult,
+    DiffStats,
+    diff_files_stats,
+    identical_pairs,
+    run_many,
+    use_native,
+    DIFF_NATIVE_MAX_EDITS,
+)
 
 DiffOptions = Iterable[str]
-DiffLines = List[str]
 DiffCode = Literal["=", "+", "-"]
 DiffCommand = List[str]
 
@@ -43,50 +55,166 @@ class Diff:
     a: File
     b: File
     differences: List[Difference]
+    # (old_count, new_count), when differences is truncated:
+    counts: Tuple[int, int] | None = None
 
     @cached_property
     def is_same(self) -> bool:
         return self.a.md5sum == self.b.md5sum or self.change_count == 0
 
+    @cached_property
+    def is_truncated(self) -> bool:
+        return self.change_count > len(self.differences)
+
     @cached_property
     def old_count(self) -> int:
+        if self.counts:
+            return self.counts[0]
         return count(self.differences, lambda d: d.code == "-")
 
     @cached_property
     def new_count(self) -> int:
+        if self.counts:
+            return self.counts[1]
         return count(self.differences, lambda d: d.code == "+")
 
     @cached_property
     def change_count(self) -> int:
         return self.old_count + self.new_count
 
+    @cached_property
+    def stats(self) -> DiffResult:
+        "See diff.diff_files_stats."
+        return diff_files_stats(
+            self.a.n_lines,
+            self.b.n_lines,
+            self.old_count,
+            self.new_count,
+            0 if self.is_same else 1,
+        )
+
 
 def diff_files(
-    expected_file: str, actual_file: str, *diff_options: DiffOptions
+    expected_file: str,
+    actual_file: str,
+    *diff_options: DiffOptions,
+    max_differences: int | None = None,
 ) -> Diff:
-    a_file = expected_file if os.path.isfile(expected_file) else "/dev/null"
-    b_file = actual_file if os.path.isfile(actual_file) else "/dev/null"
-    diff_lines = diff_exec(a_file, b_file, *diff_options)
-    diffs = [parse_diff_line(line) for line in diff_lines]
-    diffs = [diff for diff in diffs if diff is not None]
-    return Diff(
-        a=File(Path(expected_file)),
-        b=File(Path(actual_file)),
-        differences=diffs,
+    """
+    If max_differences is given, the output of diff(1) is streamed:
+    only the first max_differences Differences are kept, but all are counted.
+    """
+    a = File(Path(expected_file))
+    b = File(Path(actual_file))
+    a_exists, b_exists = os.path.isfile(expected_file), os.path.isfile(actual_file)
+    if a_exists and b_exists and a.n_bytes == b.n_bytes and a.md5sum == b.md5sum:
+        return Diff(a=a, b=b, differences=[])
+    a_file = expected_file if a_exists else "/dev/null"
+    b_file = actual_file if b_exists else "/dev/null"
+    if max_differences is None and DIFF_NATIVE and not diff_options:
+        if use_native(a_file, b_file):
+            if (differences := diff_native(a_file, b_file)) is not None:
+                return Diff(a=a, b=b, differences=differences)
+    diffs, counts = diff_exec(
+        a_file, b_file, *diff_options, max_differences=max_differences
     )
+    return Diff(a=a, b=b, differences=diffs, counts=counts)
+
+
+def diff_many(
+    pairs: Iterable[DiffPair],
+    *diff_options: DiffOptions,
+    workers: int | None = None,
+    processes: bool = False,
+    stats: DiffStats | None = None,
+) -> Iterator[Tuple[DiffPair, Diff]]:
+    """
+    Yields ((expected_file, actual_file), Diff) for each pair as it completes.
+    See diff.diff_many.
+    """
+    pairs = list(pairs)
+    same = identical_pairs(pairs, workers)
+    diffs = (
+        (pair, Diff(a=File(Path(pair[0])), b=File(Path(pair[1])), differences=[]))
+        for pair in pairs
+        if pair in same
+    )
+    jobs = [
+        (pair, (diff_files, *pair, *diff_options)) for pair in pairs if pair not in same
+    ]
+    for pair, diff in chain(diffs, run_many(jobs, workers, processes)):
+        if stats is not None:
+            stats.add(diff.stats)
+        yield pair, diff
 
 
 def parse_diff_line(line: str) -> Difference:
+    "Parses a line of diff_cmd_gnu output: CODE LINE_NO SPACE TEXT."
     code, line = line[0], line[1:]
+    line_no, _, line = line.partition(" ")
     if code == "-":
-        return Difference("-", 0, line, None)
+        return Difference("-", int(line_no), line, None)
     if code == "+":
-        return Difference("+", 0, None, line)
+        return Difference("+", int(line_no), None, line)
     if code == "=":
-        return Difference("=", 0, line, line)
+        return Difference("=", int(line_no), line, line)
     raise ValueError(f"invalid diff code {code!r}")
 
 
+def parse_diff_output(
+    lines: Iterable[str], fences: bool | None = None
+) -> Iterator[Difference]:
+    "Parses the output of DIFF_CMD."
+    if not (DIFF_FENCES if fences is None else fences):
+        yield from map(parse_diff_line, lines)
+        return
+    a_line_no = b_line_no = 0
+    in_hunk = False
+    for line in lines:
+        if m := re.match(HUNK_RX, line):
+            a_line_no, b_line_no = int(m[1]), int(m[2])
+            in_hunk = True
+        elif not in_hunk:
+            continue
+        elif line.startswith("-"):
+            yield Difference("-", a_line_no, line[1:], None)
+            a_line_no += 1
+        elif line.startswith("+"):
+            yield Difference("+", b_line_no, None, line[1:])
+            b_line_no += 1
+
+
+HUNK_RX = re.compile(r"^@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+
+##############################################
+
+
+def diff_native(expected_file: str, actual_file: str) -> List[Difference] | None:
+    """
+    Diffs in-process.
+    Difference.line_no is the line number in expected_file for "-"
+    and in actual_file for "+".
+    Returns None if there are more than DIFF_NATIVE_MAX_EDITS differences.
+    """
+    a_lines, b_lines = read_lines(expected_file), read_lines(actual_file)
+    edits = diff_lines(a_lines, b_lines, DIFF_NATIVE_MAX_EDITS)
+    if edits is None:
+        return None
+    return [
+        (
+            Difference("-", i + 1, line_text(a_lines[i]), None)
+            if code == "-"
+            else Difference("+", j + 1, None, line_text(b_lines[j]))
+        )
+        for code, i, j in edits
+    ]
+
+
+def line_text(line: bytes) -> str:
+    return line.decode("utf-8", errors="replace").removesuffix("\n")
+
+
 ##############################################
 
 
@@ -94,21 +222,31 @@ def diff_exec(
     expected_file: str,
     actual_file: str,
     *diff_options,
-) -> DiffLines:
+    max_differences: int | None = None,
+) -> Tuple[List[Difference], Tuple[int, int]]:
+    """
+    Streams the output of DIFF_CMD.
+    Returns the first max_differences Differences and (old_count, new_count).
+    """
     command = DIFF_CMD(expected_file, actual_file, diff_options)
-    diff_result = exec_command(
-        command, check=False, capture_output=True, encoding="utf8"
-    )
-    if diff_result.stderr:
-        raise Exception(
-            f"diff_exec: failed : {diff_result.returncode}"
-            f": {command!r} : "
-            f"{diff_result.stderr.splitlines()[:5]!r}"
+    diffs: List[Difference] = []
+    old = new = 0
+
+    def consume(stdout: IO[bytes]) -> None:
+        nonlocal old, new
+        lines = (
+            line.decode("utf-8", errors="replace").removesuffix("\n") for line in stdout
         )
-    lines = diff_result.stdout.splitlines()
-    if DIFF_FENCES:
-        lines = [line for line in lines[2:] if not line.startswith(b"@@ ")]
-    return lines
+        for diff in parse_diff_output(lines):
+            if diff.code == "-":
+                old += 1
+            else:
+                new += 1
+            if max_differences is None or len(diffs) < max_differences:
+                diffs.append(diff)
+
+    exec_pipe(command, consume)
+    return diffs, (old, new)
 
 
 def diff_cmd_gnu(
@@ -119,8 +257,8 @@ def diff_cmd_gnu(
     return [
         DIFF_PROG,
         "--minimal",
-        "--old-line-format=-\n",
-        "--new-line-format=+\n",
+        "--old-line-format=-%dn %l\n",
+        "--new-line-format=+%dn %l\n",
         "--unchanged-line-format=",
         *diff_options,
         expected_file,
@@ -159,3 +297,5 @@ else:
     DIFF_CMD = diff_cmd_gnu
 
 DIFF_FENCES = DIFF_FLAVOR == "bsd"
+# Opt in: use diff_native, unless diff_options are given.  See diff.DIFF_NATIVE.
+DIFF_NATIVE = False
@@ -0,0 +1,85 @@
+from . import diff_v2 as sut
+
+EXPECTED = "tests/devdriven/data/expected.txt"
+ACTUAL = "tests/devdriven/data/actual.txt"
+
+
+def test_diff_files():
+    result = sut.diff_files(EXPECTED, ACTUAL)
+    assert result.is_same is False
+    assert (result.old_count, result.new_count) == (4, 3)
+    assert result.differences == [
+        sut.Difference("-", 1, "0", None),
+        sut.Difference("-", 2, "1", None),
+        sut.Difference("-", 7, "6", None),
+        sut.Difference("-", 8, "7", None),
+        sut.Difference("+", 6, None, "DIFFERENT"),
+        sut.Difference("+", 9, None, "11"),
+        sut.Difference("+", 10, None, "12"),
+    ]
+    result = sut.diff_files(EXPECTED, EXPECTED)
+    assert result.is_same is True
+    assert not result.differences
+
+
+def test_diff_files_exec():
+    result = sut.diff_files(EXPECTED, ACTUAL, "--minimal")
+    assert (result.old_count, result.new_count) == (4, 3)
+    assert result.differences == sut.diff_files(EXPECTED, ACTUAL).differences
+
+
+def test_diff_files_native(monkeypatch):
+    expected = sut.diff_files(EXPECTED, ACTUAL)
+    monkeypatch.setattr(sut, "DIFF_NATIVE", True)
+    result = sut.diff_files(EXPECTED, ACTUAL)
+    assert result.differences == expected.differences
+    assert (result.old_count, result.new_count) == (4, 3)
+
+
+def test_diff_files_max_differences():
+    result = sut.diff_files(EXPECTED, ACTUAL, max_differences=2)
+    assert result.differences == [
+        sut.Difference("-", 1, "0", None),
+        sut.Difference("-", 2, "1", None),
+    ]
+    assert (result.old_count, result.new_count) == (4, 3)
+    assert result.is_truncated is True
+    assert result.stats["differences"] == 7
+    result = sut.diff_files(EXPECTED, ACTUAL, max_differences=0)
+    assert not result.differences
+    assert result.change_count == 7
+
+
+def test_parse_diff_output_fences():
+    output = """\
+--- expected.txt
++++ actual.txt
+@@ -1,2 +0,0 @@
+-0
+-1
+@@ -9,0 +6 @@
++DIFFERENT
+\\ No newline at end of file
+"""
+    assert list(sut.parse_diff_output(output.splitlines(), fences=True)) == [
+        sut.Difference("-", 1, "0", None),
+        sut.Difference("-", 2, "1", None),
+        sut.Difference("+", 6, None, "DIFFERENT"),
+    ]
+
+
+def test_diff_files_non_existant():
+    result = sut.diff_files(EXPECTED, "Does-Not-Exist.txt")
+    assert (result.old_count, result.new_count) == (11, 0)
+
+
+def test_diff_many():
+    pairs = [(EXPECTED, ACTUAL), (EXPECTED, EXPECTED), (ACTUAL, EXPECTED)]
+    stats = sut.DiffStats()
+    results = dict(sut.diff_many(pairs, workers=2, stats=stats))
+    assert results[pairs[0]].differences == sut.diff_files(*pairs[0]).differences
+    assert results[pairs[1]].is_same is True
+    assert results[pairs[2]].change_count == 7
+    assert stats.count == 3
+    assert stats.correct == 1
+    assert stats.correct_ratio_min == 0.6666666666666666
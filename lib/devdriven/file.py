@@ -1,9 +1,13 @@
-from typing import Any, List
-import platform
+from typing import Any, BinaryIO, Dict, Iterable, List, Tuple, cast
 import os
 import pickle
 import bz2
-from .util import exec_command
+import hashlib
+import threading
+from stat import S_ISREG
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from .util import exec_command, memoize
 
 
 def read_file(name: str, encoding: str | None = None) -> bytes | str | None:
@@ -35,7 +39,7 @@ def delete_file(path: str) -> bool:
 
 def file_md5(file: str, md5_cmd: str | None = None) -> str | None:
     if not md5_cmd:
-        md5_cmd = "md5" if platform.system() == "Darwin" else "md5sum"
+        return file_hash(file, "md5")
     result = exec_command(
         [md5_cmd, file], check=False, capture_output=True, encoding="utf-8"
     )
@@ -46,6 +50,69 @@ def file_md5(file: str, md5_cmd: str | None = None) -> str | None:
     return None
 
 
+#########################################
+# Hashing:
+
+HASH_ALGORITHM = "md5"
+HASH_CACHE_SIZE = 100000
+
+
+def file_hash(path: str, algorithm: str = HASH_ALGORITHM) -> str | None:
+    """
+    Returns the hexdigest of the content of path, or None if it cannot be read.
+    Digests of regular files are cached by (dev, ino, size, mtime_ns).
+    """
+    try:
+        stat = os.stat(path)
+        if not S_ISREG(stat.st_mode):
+            return file_hash_read(path, algorithm)
+        return _file_hash_cached(path, algorithm, stat)
+    except OSError:
+        return None
+
+
+def hash_files(
+    paths: Iterable[str], workers: int | None = None, algorithm: str = HASH_ALGORITHM
+) -> Dict[str, str | None]:
+    """
+    Returns {path: file_hash(path)} for all paths.
+    Files are hashed on a pool of workers threads: hashlib releases the GIL.
+    """
+    paths = list(paths)
+
+    def hash_path(path: str) -> str | None:
+        return file_hash(path, algorithm)
+
+    if workers == 1 or len(paths) < 2:
+        return dict(zip(paths, map(hash_path, paths)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(paths, executor.map(hash_path, paths)))
+
+
+def file_hash_read(path: str, algorithm: str = HASH_ALGORITHM) -> str:
+    digest = hashlib.new(algorithm, usedforsecurity=False)
+    buf = read_buffer()
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as input_io:
+        while size := input_io.readinto(buf):
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+
+@memoize(
+    maxsize=HASH_CACHE_SIZE,
+    key=lambda _path, algorithm, stat: (
+        stat.st_dev,
+        stat.st_ino,
+        stat.st_size,
+        stat.st_mtime_ns,
+        algorithm,
+    ),
+)
+def _file_hash_cached(path: str, algorithm: str, _stat: os.stat_result) -> str:
+    return file_hash_read(path, algorithm)
+
+
 def file_size(path: str) -> int | None:
     try:
         return os.stat(path).st_size
@@ -53,30 +120,104 @@ def file_size(path: str) -> int | None:
         return None
 
 
-BUFFER_SIZE = 8192
-NEWLINE_BYTE = b"\n"[0]
+#########################################
+# Line counting:
+
+
+@dataclass
+class LineCount:
+    lines: int
+    bytes: int
+    eol_at_end: bool
+
+
+LINE_COUNT_SPLIT_SIZE = 64 * 1024 * 1024
+
+
+def file_nlines(path: str, eol: bytes = b"\n") -> int | None:
+    if line_count := file_line_count(path, eol):
+        return line_count.lines
+    return None
 
 
-def file_nlines(
-    path: str, eol: bytes = b"\n", buffer_size: int = BUFFER_SIZE
-) -> int | None:
-    # For large files: wc -l 'path' will be faster.
-    last_buffer = None
-    count = byte_count = 0
+def file_line_count(
+    path: str,
+    eol: bytes = b"\n",
+    workers: int | None = None,
+    split_size: int = LINE_COUNT_SPLIT_SIZE,
+) -> LineCount | None:
+    """
+    Counts lines and bytes in path in a single pass.
+    A last line without eol is counted.
+    Regular files of at least split_size bytes are counted
+    in byte ranges by workers threads, if workers > 1.
+    """
     assert len(eol) == 1
     try:
-        with open(path, "rb") as input_io:
-            while buf := input_io.read(buffer_size):
-                last_buffer = buf
-                count += buf.count(eol)
-                byte_count += len(buf)
-        if byte_count == 0:
-            return 0
-        if last_buffer and last_buffer[-1] == NEWLINE_BYTE:
-            return count
-        return count + 1
+        with open(path, "rb", buffering=0) as input_io:
+            stat = os.fstat(input_io.fileno())
+            n_bytes = stat.st_size
+            if (workers or 1) > 1 and n_bytes >= split_size and S_ISREG(stat.st_mode):
+                eols = _count_eols_parallel(path, eol, n_bytes, cast(int, workers))
+                input_io.seek(n_bytes - 1)
+                last = input_io.read(1)
+            else:
+                eols, n_bytes, last = _count_eols(input_io, eol)
     except OSError:
         return None
+    eol_at_end = last == eol
+    lines = eols if eol_at_end or not n_bytes else eols + 1
+    return LineCount(lines=lines, bytes=n_bytes, eol_at_end=eol_at_end)
+
+
+def _count_eols(input_io: BinaryIO, eol: bytes) -> Tuple[int, int, bytes]:
+    buf = read_buffer()
+    eols = n_bytes = size = 0
+    last = b""
+    while read_size := input_io.readinto(buf):  # type: ignore[attr-defined]
+        eols += buf.count(eol, 0, read_size)
+        n_bytes += read_size
+        size = read_size
+    if size:
+        last = bytes(buf[size - 1 : size])
+    return eols, n_bytes, last
+
+
+def _count_eols_parallel(path: str, eol: bytes, n_bytes: int, workers: int) -> int:
+    chunk_size = -(-n_bytes // workers)
+
+    def count_range(start: int) -> int:
+        buf = read_buffer()
+        view = memoryview(buf)
+        eols, remaining = 0, min(chunk_size, n_bytes - start)
+        with open(path, "rb", buffering=0) as input_io:
+            input_io.seek(start)
+            while remaining > 0:
+                read_size = input_io.readinto(view[: min(len(buf), remaining)])
+                if not read_size:
+                    break
+                eols += buf.count(eol, 0, read_size)
+                remaining -= read_size
+        return eols
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(count_range, range(0, n_bytes, chunk_size)))
+
+
+#########################################
+# Buffers:
+
+READ_BUFFER_SIZE = 1024 * 1024
+
+
+def read_buffer() -> bytearray:
+    "Returns a reusable buffer of READ_BUFFER_SIZE bytes for the current thread."
+    if (buf := getattr(_READ_BUFFERS, "buf", None)) is None:
+        buf = _READ_BUFFERS.buf = bytearray(READ_BUFFER_SIZE)
+    return buf
+
+
+_READ_BUFFERS = threading.local()
 
 
 def pickle_bz2(file: str, mode: str, data: Any = None) -> Any:
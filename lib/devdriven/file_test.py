@@ -17,6 +17,31 @@ def test_file_size():
 def test_file_md5():
     assert sut.file_md5("/dev/null") == "d41d8cd98f00b204e9800998ecf8427e"
     assert sut.file_md5("Does-Not-Exist") is None
+    assert sut.file_md5("README.md") == sut.file_md5("README.md", "md5sum")
+
+
+def test_file_hash():
+    with tempfile.NamedTemporaryFile() as tmp:
+        tmp.write(b"abc\n" * 1000000)
+        tmp.flush()
+        assert sut.file_hash(tmp.name) == "3adaeab79481253cdfb46a6f4063383d"
+        assert sut.file_hash(tmp.name, "sha1") == (
+            "0f913927d9138322181e21234d6254f2b44f095a"
+        )
+        tmp.write(b"x")
+        tmp.flush()
+        assert sut.file_hash(tmp.name) != "3adaeab79481253cdfb46a6f4063383d"
+    assert sut.file_hash("/dev/null", "sha256") == (
+        "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+    )
+    assert sut.file_hash("Does-Not-Exist") is None
+
+
+def test_hash_files():
+    paths = ["README.md", "/dev/null", "Does-Not-Exist"]
+    expected = {path: sut.file_md5(path) for path in paths}
+    assert sut.hash_files(paths, workers=3) == expected
+    assert sut.hash_files(paths, workers=1) == expected
 
 
 def test_file_nlines():
@@ -43,6 +68,31 @@ def test_file_nlines():
     assert sut.file_nlines("Does-Not-Exist") is None
 
 
+def test_file_line_count():
+    def fut(buf, expected, **kwargs):
+        with tempfile.NamedTemporaryFile() as tmp:
+            tmp.write(buf)
+            tmp.flush()
+            actual = sut.file_line_count(tmp.name, **kwargs)
+            tmp.close()
+        assert (buf, actual) == (buf, expected)
+
+    fut(b"", sut.LineCount(0, 0, False))
+    fut(b"\n", sut.LineCount(1, 1, True))
+    fut(b"1\n2", sut.LineCount(2, 3, False))
+    fut(b"1\n2\n", sut.LineCount(2, 4, True))
+    fut(b"1|2|", sut.LineCount(2, 4, True), eol=b"|")
+    for buf in (b"abc\n" * 1000, b"abc\n" * 1000 + b"d", b"\n" * 999):
+        with tempfile.NamedTemporaryFile() as tmp:
+            tmp.write(buf)
+            tmp.flush()
+            expected = sut.file_line_count(tmp.name)
+        fut(buf, expected, workers=4, split_size=1)
+        fut(buf, expected, workers=7, split_size=1)
+    assert sut.file_line_count("/dev/null") == sut.LineCount(0, 0, False)
+    assert sut.file_line_count("Does-Not-Exist") is None
+
+
 def test_pickle_bz2():
     data = {"a": 1, "b": 2}
     with tempfile.NamedTemporaryFile() as tmp:
@@ -1,13 +1,18 @@
-from typing import Any, Self, List, Tuple, Dict, IO
+from typing import Any, Self, List, Tuple, Dict, IO, Callable, Sequence
 from io import StringIO
 from pathlib import Path
+import os
 import re
+import hashlib
+import tempfile
 from dataclasses import dataclass, field
 import html
+import json
 import cmath
 from mako.template import Template  # type: ignore
 from mako.runtime import Context  # type: ignore
 from .resource import Resources
+from .util import memoize, batched
 
 res_html = Resources([]).add_file_dir(__file__, "resources/html")
 res_table = Resources([]).add_file_dir(__file__, "resources/html/table")
@@ -19,7 +24,7 @@ res_css = Resources([]).add_file_dir(__file__, "resources/css")
 @dataclass
 class Table:
     columns: list = field(default_factory=list)
-    rows: List[Any] = field(default_factory=list)
+    rows: Sequence[Any] = field(default_factory=list)
     options: dict = field(default_factory=dict)
     output: IO | None = None
     data: dict = field(default_factory=dict)
@@ -61,21 +66,29 @@ class Table:
             "title_tr": self.title_tr(),
         }
 
-        self.render_template(self.template_text())
+        template = compiled_template(self.template_parts())
+        template.render_context(Context(self.output, **self.data))
         return self
 
     def template_text(self) -> str:
+        return self.join_templates(self.template_parts())
+
+    def template_parts(self) -> Tuple[str, ...]:
+        "The templates selected by the options."
         templates = [TABLE_HEAD]
         if self.opt("thead", True):
             templates += [THEAD_HEAD]
             if self.opt("filtering"):
                 templates += [THEAD_FILTERING]
             templates += [THEAD_COLUMNS, THEAD_FOOT]
-        templates += [TBODY, TABLE_FOOT]
+        if self.opt("virtual"):
+            templates += [VIRTUAL_TBODY, TABLE_FOOT, VIRTUAL_DATA]
+        else:
+            templates += [TBODY, TABLE_FOOT]
         if not self.opt("table_only"):
             templates = [HTML_HEAD, *templates, HTML_FOOT]
         templates += [TABLE_INIT]
-        return self.join_templates(templates)
+        return tuple(templates)
 
     def render_template(self, text: str) -> Self:
         template, context = self.template_context(text)
@@ -88,11 +101,8 @@ class Table:
             Context(self.output, **self.data),
         )
 
-    def join_templates(self, templates: List[str]):
-        def strip_it(text: str) -> str:
-            return re.sub(r"^\s*\n+|\s*\n+$", "", text, count=1)
-
-        return "".join(map(strip_it, templates))
+    def join_templates(self, templates: Sequence[str]):
+        return join_templates(templates)
 
     ######################################
     # Options:
@@ -103,7 +113,7 @@ class Table:
             self.options["styled"] = False
             self.options["sorting"] = False
             self.options["filtering"] = False
-        if self.opt("sorting") or self.opt("filtering"):
+        if self.opt("sorting") or self.opt("filtering") or self.opt("virtual"):
             self.options["styled"] = True
         # Merge and amend column options:
         opt_cols = self.options.get("columns", {})
@@ -221,6 +231,122 @@ class Table:
         data = str(data)
         return data
 
+    ######################################
+    # Rows:
+
+    def write_rows(self, write: Callable[[str], Any]) -> None:
+        "Writes the tbody rows, ROWS_PER_WRITE at a time."
+        render_row = self.row_renderer()
+        rows: List[str] = []
+        for row_idx, row in enumerate(self.rows, 1):
+            rows.append(render_row(row, row_idx))
+            if len(rows) >= ROWS_PER_WRITE:
+                write("".join(rows))
+                rows.clear()
+        if rows:
+            write("".join(rows))
+
+    def row_renderer(self) -> Callable[[Any, int], str]:
+        """
+        Returns render_row(row, row_idx) -> str.
+        Options, attributes and escaping are decided once per column.
+        """
+        height = self.height
+        allow_attributes = self.data["allow_attributes"]
+        row_index_td = f"<td {self.class_('cx-right')}>"
+        row_index = self.opt("row_index")
+        cells = [
+            (col, *self.td_parts(col), self.cell_renderer(col)) for col in self.columns
+        ]
+
+        def render_row(row: Any, row_idx: int) -> str:
+            row_tooltip = f"{row_idx} / {height}"
+            tr = [f"  \n<tr {self.attr('title', row_tooltip)}>\n"]
+            if row_index:
+                tr.append(f"{row_index_td}{row_idx}</td>\n")
+            row_tooltip = f"{row_tooltip} - " if allow_attributes else ""
+            for col, td_head, td_tail, cell in cells:
+                tr += (td_head, row_tooltip, td_tail, cell(row.get(col, "")), "</td>\n")
+            tr.append("</tr>\n")
+            return "".join(tr)
+
+        return render_row
+
+    ######################################
+    # Virtual rows:
+    #
+    # Option virtual: rows are written as JS arrays;
+    # virtual_table.js renders the rows in view, sorts and filters.
+
+    def write_virtual_rows(self, write: Callable[[str], Any]) -> None:
+        "Writes rows as JSON arrays, ROWS_PER_WRITE at a time."
+        encode = json.JSONEncoder(
+            default=str, ensure_ascii=False, separators=(",", ":")
+        ).encode
+        columns = self.columns
+        for rows in batched(self.rows, ROWS_PER_WRITE):
+            data = script_safe(
+                encode([[row.get(col, "") for col in columns] for row in rows])
+            )
+            write(f"<script>cx_rows.push({data[1:-1]});</script>\n")
+
+    def virtual_columns(self) -> str:
+        return script_json(
+            [
+                {
+                    "name": col,
+                    "td_class": self.col_opt(col, "td_class"),
+                    "raw": bool(self.col_opt(col, "raw", False)),
+                    "links": bool(
+                        self.col_opt(col, "render_links", self.opt("render_links"))
+                    ),
+                    "none_as": self.col_opt(col, "none_as", self.opt("none_as")),
+                    "nan_as": self.col_opt(col, "nan_as", self.opt("nan_as")),
+                }
+                for col in self.columns
+            ]
+        )
+
+    def virtual_options(self) -> str:
+        return script_json(
+            {
+                "row_index": bool(self.opt("row_index")),
+                "sorting": bool(self.opt("sorting")),
+                "row_height": self.opt("row_height"),
+                "max_height": self.opt("max_height"),
+            }
+        )
+
+    def td_parts(self, col: str) -> Tuple[str, str]:
+        "The <td> tag of col, before and after the row tooltip.  See td."
+        if not self.data["allow_attributes"]:
+            return "<td >", ""
+        td_class = self.class_(self.col_opt(col, "td_class"))
+        td_class = f"{td_class} " if td_class else ""
+        return f'<td {td_class}title="', f'{col}">'
+
+    def cell_renderer(self, col: str) -> Callable[[Any], str]:
+        "Returns cell(data) -> str.  See cell."
+        none_as = self.col_opt(col, "none_as", self.opt("none_as"))
+        nan_as = self.col_opt(col, "nan_as", self.opt("nan_as"))
+        render_links = self.col_opt(col, "render_links", self.opt("render_links"))
+        raw = self.col_opt(col, "raw", False)
+        escape = self.h
+
+        def cell(data: Any) -> str:
+            if data is None:
+                if none_as is not None:
+                    return none_as
+            elif isinstance(data, float) and cmath.isnan(data):
+                if nan_as is not None:
+                    return nan_as
+            elif render_links:
+                if link := html_link(data):
+                    return link
+            return str(data) if raw else escape(data)
+
+        return cell
+
     def title_tr(self) -> str:
         def stat(n, axis):
             return tooltip(n, f"{n} {axis}")
@@ -293,6 +419,88 @@ class Table:
     def style(self, content: str) -> str:
         return tag_maybe("style", content)
 
+    ######################################
+    # Bundles:
+    #
+    # Option bundle: emit the stylesheets and scripts as one tag each.
+    # Option bundle_dir: write them to content-addressed files in bundle_dir,
+    # shared by all tables, and refer to them by bundle_url (default: bundle_dir).
+
+    def stylesheets(self) -> List[Tuple[Resources, str]]:
+        stylesheets = []
+        if self.opt("styled"):
+            stylesheets.append((res_css, "cx.css"))
+        if self.opt("stylesheet"):
+            stylesheets.append((res_css, self.opt("stylesheet")))
+        return stylesheets
+
+    def scripts(self) -> List[Tuple[Resources, str]]:
+        if self.opt("virtual"):
+            return [(res_js, "virtual_table.js")]
+        scripts = []
+        if self.opt("filtering"):
+            scripts += FILTERING_SCRIPTS
+        if self.opt("sorting"):
+            scripts += SORTING_SCRIPTS
+        return scripts
+
+    def bundle(self, resources: List[Tuple[Resources, str]], suffix: str) -> str:
+        content = "\n".join(self.resource_min(res, name) for res, name in resources)
+        if not content:
+            return ""
+        if bundle_dir := self.opt("bundle_dir"):
+            file = write_bundle(bundle_dir, content, suffix)
+            url = self.h(f"{self.opt('bundle_url', bundle_dir)}/{file}")
+            if suffix == ".css":
+                return f'<link rel="stylesheet" href="{url}">\n'
+            return f'<script src="{url}"></script>\n'
+        if suffix == ".css":
+            return self.style(content)
+        return self.javascript(content)
+
+
+@memoize(maxsize=64)
+def compiled_template(templates: Tuple[str, ...]) -> Template:
+    "Compiles each selection of templates once."
+    return Template(text=join_templates(templates), strict_undefined=True)
+
+
+def join_templates(templates: Sequence[str]) -> str:
+    def strip_it(text: str) -> str:
+        return re.sub(r"^\s*\n+|\s*\n+$", "", text, count=1)
+
+    return "".join(map(strip_it, templates))
+
+
+def write_bundle(bundle_dir: str, content: str, suffix: str) -> str:
+    "Writes content to bundle_dir, once; returns its file name."
+    data = content.encode("utf-8")
+    name = f"cx-{hashlib.md5(data, usedforsecurity=False).hexdigest()}{suffix}"
+    path = os.path.join(bundle_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(bundle_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=bundle_dir, delete=False) as output:
+            output.write(data)
+        # NamedTemporaryFile is 0600: published files must be readable by the server.
+        os.chmod(output.name, 0o666 & ~current_umask())
+        os.replace(output.name, path)
+    return name
+
+
+def current_umask() -> int:
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def script_json(obj: Any) -> str:
+    "JSON for a <script> element."
+    return script_safe(json.dumps(obj))
+
+
+def script_safe(text: str) -> str:
+    return text.replace("</", "<\\/")
+
 
 def tooltip(content: str, title: str) -> str:
     return f'<a href="#" class="cx-tooltip" title="{title}">{content}</a>'
@@ -315,6 +523,9 @@ def html_link(url: str, attrs=None) -> str | None:
 
 EMPTY_DICT: Dict[Any, Any] = {}
 
+# Table.write_rows: rows joined per write to output.
+ROWS_PER_WRITE = 1000
+
 UNICODE = {
     # Left-Pointing Magnifying Glass : U+1F50D
     "search": "🔍",
@@ -330,11 +541,12 @@ HTML_HEAD = """
 % if opt('title'):
 <title>${h(opt('title'))}</title>
 % endif
-% if opt('styled'):
-${this.style(this.resource_min(css, 'cx.css'))}
-% endif
-% if opt('stylesheet'):
-${this.style(this.resource_min(css, opt('stylesheet')))}
+% if opt('bundle') or opt('bundle_dir'):
+${this.bundle(this.stylesheets(), '.css')}
+% else:
+% for res, name in this.stylesheets():
+${this.style(this.resource_min(res, name))}
+% endfor
 % endif
 ${this.resource(table, 'html-head-footer.html')}
 ${this.resource_opt(table, 'html_head_footer', '')}
@@ -372,21 +584,19 @@ ${this.resource_opt(table, 'table_foot', '')}
 """
 
 TABLE_INIT = """
-% if opt('filtering'):
-${this.javascript(this.resource_min(vendor, "zepto-1.2.0/zepto.js"))}
-${this.javascript(this.resource_min(js, "parser_combinator.js"))}
-${this.javascript(this.resource_min(js, "filter.js"))}
-%endif
-% if opt('sorting'):
-${this.javascript(this.resource_min(vendor, "tablesort-5.3.0/src/tablesort.js"))}
-${this.javascript(this.resource_min(vendor, "tablesort-5.3.0/src/sorts/tablesort.number.js"))}
-${this.javascript(this.resource_min(vendor, "tablesort-5.3.0/src/sorts/tablesort.date.js"))}
-${this.javascript(this.resource_min(vendor, "tablesort-5.3.0/src/sorts/tablesort.monthname.js"))}
-${this.javascript(this.resource_min(vendor, "tablesort-5.3.0/src/sorts/tablesort.dotsep.js"))}
-${this.javascript(this.resource_min(vendor, "tablesort-5.3.0/src/sorts/tablesort.filesize.js"))}
+% if opt('bundle') or opt('bundle_dir'):
+${this.bundle(this.scripts(), '.js')}
+% else:
+% for res, name in this.scripts():
+${this.javascript(this.resource_min(res, name))}
+% endfor
 %endif
 
-% if opt('sorting') or opt('filtering'):
+% if opt('virtual'):
+<script>
+  var cx_filter = cx_virtual_table("cx-table", cx_columns, cx_rows, ${this.virtual_options()});
+</script>
+% elif opt('sorting') or opt('filtering'):
 <script>
   var cx_filter;
 $(document).ready(function() {
@@ -413,6 +623,21 @@ $(document).ready(function() {
 
 """
 
+FILTERING_SCRIPTS = [
+    (res_vendor, "zepto-1.2.0/zepto.js"),
+    (res_js, "parser_combinator.js"),
+    (res_js, "filter.js"),
+]
+
+SORTING_SCRIPTS = [
+    (res_vendor, "tablesort-5.3.0/src/tablesort.js"),
+    (res_vendor, "tablesort-5.3.0/src/sorts/tablesort.number.js"),
+    (res_vendor, "tablesort-5.3.0/src/sorts/tablesort.date.js"),
+    (res_vendor, "tablesort-5.3.0/src/sorts/tablesort.monthname.js"),
+    (res_vendor, "tablesort-5.3.0/src/sorts/tablesort.dotsep.js"),
+    (res_vendor, "tablesort-5.3.0/src/sorts/tablesort.filesize.js"),
+]
+
 #########################################
 
 THEAD_HEAD = """
@@ -476,20 +701,25 @@ THEAD_FILTERING = """
 
 #########################################
 
+VIRTUAL_TBODY = """
+<tbody ${class_("cx-tbody")}>
+</tbody>
+"""
+
+VIRTUAL_DATA = """
+<script>
+  var cx_columns = ${this.virtual_columns()};
+  var cx_rows = [];
+</script>
+<% this.write_virtual_rows(context.write) %>\
+"""
+
+#########################################
+
 TBODY = """
 <tbody ${class_("cx-tbody")}>
-<% row_idx = 0 %>
-% for row in rows:
-  <% row_idx += 1; row_tooltip = f'{row_idx} / {height}' %>
-<tr ${attr("title", row_tooltip)}>
-%if opt('row_index'):
-<td ${class_("cx-right")}>${row_idx}</td>
-%endif
-% for col in columns:
-${td(row, row_idx, col)}
-% endfor
-</tr>
-% endfor
+
+<% this.write_rows(context.write) %>\
 </tbody>
 """
 
@@ -1,4 +1,7 @@
-from .html import Table
+import os
+import tempfile
+from io import StringIO
+from .html import Table, compiled_template
 
 
 def test_table():
@@ -32,3 +35,66 @@ def test_table():
         html.write(result)
     print(len(result))
     assert len(result) > 8192
+
+
+def test_table_write_rows():
+    columns = ["a", "b"]
+    rows = [{"a": i, "b": f"<{i}>"} for i in range(2500)]
+    writes = []
+
+    class Output(StringIO):
+        def write(self, s):
+            writes.append(len(s))
+            return super().write(s)
+
+    options = {"table_only": True, "styled": True, "none_as": "-"}
+    result = Table(columns=columns, rows=rows, options=options, output=Output())
+    result = result.render().output.getvalue()
+    assert result.count("</tr>") == 2500
+    assert '<td class="cx-nowrap" title="2500 / 2500 - b">&lt;2499&gt;</td>' in result
+    assert len([n for n in writes if n > 1000]) == 3
+    hits = compiled_template.cache_info()["hits"]
+    Table(columns=columns, rows=rows[:1], options=dict(options)).render()
+    assert compiled_template.cache_info()["hits"] == hits + 1
+
+
+def test_table_bundle():
+    rows = [{"a": 1}]
+    options = {"styled": True, "sorting": True, "filtering": True}
+    inline = Table(columns=["a"], rows=rows, options=dict(options)).render()
+    inline = inline.output.getvalue()
+    bundled = Table(columns=["a"], rows=rows, options=options | {"bundle": True})
+    bundled = bundled.render().output.getvalue()
+    assert inline.count("<script>") == 10
+    assert bundled.count("<script>") == 2
+    assert bundled.count("<style>") == 1
+    with tempfile.TemporaryDirectory() as tmp:
+        options |= {"bundle_dir": tmp, "bundle_url": "/assets"}
+        for _ in range(2):
+            result = Table(columns=["a"], rows=rows, options=dict(options)).render()
+            result = result.output.getvalue()
+            files = sorted(os.listdir(tmp), key=lambda file: os.path.splitext(file)[1])
+            assert [os.path.splitext(file)[1] for file in files] == [".css", ".js"]
+            assert f'<script src="/assets/{files[1]}"></script>' in result
+            assert f'<link rel="stylesheet" href="/assets/{files[0]}">' in result
+            assert result.count("<script>") == 1
+            assert len(result) < len(inline) / 4
+        umask = os.umask(0o022)
+        os.umask(umask)
+        for file in files:
+            assert os.stat(f"{tmp}/{file}").st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_table_virtual():
+    columns = ["a", "b"]
+    rows = [{"a": i, "b": f"</script>{i}"} for i in range(2500)]
+    rows[1]["a"] = None
+    options = {"virtual": True, "sorting": True, "filtering": True}
+    result = Table(columns=columns, rows=rows, options=options).render()
+    result = result.output.getvalue()
+    assert "<td" not in result
+    assert "</script>0" not in result
+    assert result.count("<script>cx_rows.push(") == 3
+    assert 'cx_rows.push([0,"<\\/script>0"],[null,"<\\/script>1"],' in result
+    assert "virtual_table" in result
+    assert "Tablesort" not in result
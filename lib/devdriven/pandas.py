@@ -1,14 +1,31 @@
-from typing import Any, Dict, Callable
+from typing import (
+    Any,
+    Dict,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+    TextIO,
+    Self,
+)
 import os
 import re
+import json
 import logging
 from pathlib import Path
 from datetime import datetime
 from collections import OrderedDict
-import subprocess
+import numpy as np
 import pandas as pd  # type: ignore
-from .util import reorder_list
+from .util import reorder_list, elapsed_ms, run_many, batched
+from .file import file_line_count
 from .html import Table
+from . import lazy_import
+
+pyarrow_feather = lazy_import.load("pyarrow.feather")
 
 
 def column_type_names(dframe: pd.DataFrame) -> Dict[str, str]:
@@ -19,6 +36,49 @@ def dtype_to_dict(dtype: Any) -> Dict[str, Any]:
     return {k: getattr(dtype, k, None) for k in DTYPE_ATTRS}
 
 
+def optimize_dtypes(dframe: pd.DataFrame, category_ratio: float = 0.5) -> pd.DataFrame:
+    """
+    Returns a copy of dframe with smaller dtypes:
+    * Integers are downcast to the smallest signed integer that holds them.
+    * Floats are downcast to float32 if no value changes.
+    * String columns with at most category_ratio distinct values per row
+      become categoricals.
+    See dtype_savings.
+    """
+    return dframe.apply(optimize_dtype, category_ratio=category_ratio)
+
+
+def optimize_dtype(col: pd.Series, category_ratio: float = 0.5) -> pd.Series:
+    kind = col.dtype.kind
+    if kind in "iu":
+        return pd.to_numeric(col, downcast="integer")
+    if kind == "f":
+        col_32 = col.astype("float32")
+        if col_32.astype(col.dtype).equals(col):
+            return col_32
+        return col
+    # Only strings are counted: lists and dicts are not hashable.
+    if kind == "O" and len(col) and pd.api.types.infer_dtype(col) == "string":
+        if col.nunique(dropna=True) <= len(col) * category_ratio:
+            return col.astype("category")
+    return col
+
+
+def dtype_savings(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    "Reports dtypes and bytes per column of before and after."
+    report = pd.DataFrame(
+        {
+            "column": list(before.columns),
+            "dtype_before": before.dtypes.astype(str).to_list(),
+            "dtype_after": after.dtypes.astype(str).to_list(),
+            "bytes_before": before.memory_usage(index=False, deep=True).to_list(),
+            "bytes_after": after.memory_usage(index=False, deep=True).to_list(),
+        }
+    )
+    report["ratio"] = report["bytes_after"] / report["bytes_before"].clip(lower=1)
+    return report
+
+
 DTYPE_ATTRS = [
     "name",
     "kind",
@@ -65,10 +125,48 @@ def normalize_column_name(name: str) -> str:
 
 
 def push_row(dframe: pd.DataFrame, row: Any) -> pd.DataFrame:
+    "Copies dframe for each row: see FrameBuilder."
     dframe.loc[len(dframe)] = row
     return dframe
 
 
+class FrameBuilder:
+    """
+    Accumulates rows of dicts or sequences in a list.
+    The DataFrame is built once, on demand, and reused until more rows are added.
+    """
+
+    def __init__(self, columns: Iterable[str]) -> None:
+        self.columns = list(columns)
+        self.rows: List[Tuple] = []
+        self.frame: pd.DataFrame | None = None
+
+    def append(self, row: Mapping | Sequence) -> Self:
+        "Missing keys of a dict row are None."
+        if isinstance(row, Mapping):
+            row = tuple(row.get(col) for col in self.columns)
+        self.rows.append(tuple(row))
+        self.frame = None
+        return self
+
+    def extend(self, rows: Iterable[Mapping | Sequence]) -> Self:
+        for row in rows:
+            self.append(row)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def empty(self) -> bool:
+        return not self.rows
+
+    def to_frame(self) -> pd.DataFrame:
+        if self.frame is None:
+            self.frame = pd.DataFrame.from_records(self.rows, columns=self.columns)
+        return self.frame
+
+
 agg_fun_aliases = {
     "count": "size",
     "avg": "mean",
@@ -96,6 +194,10 @@ def summary_by(
         group = group[val_col]
     df_2 = getattr(group, agg_fun_aliases.get(fun, fun))()
     df_2 = df_2.reset_index(name=name)
+    return sort_summary_by(df_2, name, sort_by, sort_ascending)
+
+
+def sort_summary_by(df_2: pd.DataFrame, name, sort_by, sort_ascending) -> Any:
     if sort_by is not None or sort_ascending is not None:
         sort_by = sort_by or name
         sort_ascending = sort_ascending is not False
@@ -123,8 +225,14 @@ def summarize(
             cols = list(dframe.columns)
         summary = dframe[cols].agg(**aggs).transpose()
     summary.reset_index(inplace=True)
+    return finish_summary(summary, rename, sort_by, sort_ascending, cols_to_end)
+
+
+def finish_summary(
+    summary: pd.DataFrame, rename, sort_by, sort_ascending, cols_to_end
+) -> pd.DataFrame:
     if rename:
-        summary.rename(columns=rename)
+        summary = summary.rename(columns=rename)
     if sort_by:
         summary.sort_values(by=sort_by, ascending=sort_ascending, inplace=True)
     if cols_to_end:
@@ -143,6 +251,131 @@ def summary_aggs(col_agg_funs) -> OrderedDict:
     return aggs
 
 
+#########################################
+# Chunked summaries:
+#
+# Each chunk is reduced to partial aggregates per group,
+# which are combined with the running totals;
+# memory is bounded by the number of groups, not rows.
+
+# Partial aggregates: how they combine across chunks.
+CHUNK_PARTIALS = {
+    "size": "sum",
+    "sum": "sum",
+    "count": "sum",
+    "min": "min",
+    "max": "max",
+}
+# Summary function: partial aggregates it needs.
+CHUNK_AGGS = {fun: [fun] for fun in CHUNK_PARTIALS} | {"mean": ["sum", "count"]}
+
+ColAgg = Tuple[str | None, str]
+
+
+def aggregate_chunks(
+    chunks: Iterable[pd.DataFrame], by: List[str], aggs: Dict[str, ColAgg]
+) -> pd.DataFrame:
+    """
+    Aggregates chunks grouped by columns by, or over all rows if by is empty.
+    aggs maps each result column to (col, fun); fun is one of CHUNK_AGGS.
+    Returns a DataFrame indexed by the group keys.
+    """
+    for col, fun in aggs.values():
+        if fun not in CHUNK_AGGS:
+            raise ValueError(
+                f"aggregate_chunks: {fun!r} for {col!r} : expected one of {list(CHUNK_AGGS)}"
+            )
+    partials = list(
+        dict.fromkeys(
+            ((None if part == "size" else col), part)
+            for col, fun in aggs.values()
+            for part in CHUNK_AGGS[fun]
+        )
+    )
+    combine = {i: CHUNK_PARTIALS[part] for i, (_col, part) in enumerate(partials)}
+    total = None
+    for chunk in chunks:
+        group = chunk.groupby(by or np.zeros(len(chunk), dtype=int))
+        partial = pd.DataFrame(
+            {
+                i: getattr(group if col is None else group[col], part)()
+                for i, (col, part) in enumerate(partials)
+            }
+        )
+        if total is not None:
+            partial = pd.concat([total, partial])
+            partial = partial.groupby(level=list(range(partial.index.nlevels)))
+            partial = partial.agg(combine)
+        total = partial
+    if total is None:
+        return pd.DataFrame(columns=list(aggs))
+
+    def result(col, fun):
+        if fun == "mean":
+            return (
+                total[partials.index((col, "sum"))]
+                / total[partials.index((col, "count"))]
+            )
+        return total[partials.index(((None if fun == "size" else col), fun))]
+
+    return pd.DataFrame({name: result(*col_fun) for name, col_fun in aggs.items()})
+
+
+def count_by_chunks(
+    chunks: Iterable[pd.DataFrame], by, name="count", sort_by=None, sort_ascending=None
+) -> pd.DataFrame:
+    "See count_by."
+    return summary_by_chunks(chunks, by, None, "size", name, sort_by, sort_ascending)
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def summary_by_chunks(
+    chunks: Iterable[pd.DataFrame],
+    by,
+    val_col,
+    fun,
+    name,
+    sort_by=None,
+    sort_ascending=None,
+) -> Any:  # pd.DataFrame:
+    "See summary_by."
+    by = [by] if isinstance(by, str) else list(by)
+    aggs = {name: (val_col, agg_fun_aliases.get(fun, fun))}
+    df_2 = aggregate_chunks(chunks, by, aggs).reset_index()
+    return sort_summary_by(df_2, name, sort_by, sort_ascending)
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def summarize_chunks(
+    chunks: Iterable[pd.DataFrame],
+    col_agg_funs,
+    group_by=None,
+    rename=None,
+    sort_by=None,
+    sort_ascending=True,
+    cols_to_end=None,
+) -> pd.DataFrame:
+    "See summarize."
+    aggs = {
+        name: (agg.column, agg.aggfunc)
+        for name, agg in summary_aggs(col_agg_funs).items()
+    }
+    summary = aggregate_chunks(chunks, group_by or [], aggs)
+    if not group_by:
+        # Same shape as summarize: a row per column.
+        cols = list(dict.fromkeys(col for col, _fun in col_agg_funs))
+        summary = pd.DataFrame(
+            {
+                name: {col: summary[name].iloc[0] if len(summary) else np.nan}
+                for name, (col, _fun) in aggs.items()
+            },
+            index=cols,
+            dtype=float,
+        )
+    summary.reset_index(inplace=True)
+    return finish_summary(summary, rename, sort_by, sort_ascending, cols_to_end)
+
+
 def reorder_cols(dframe: pd.DataFrame, front=None, back=None) -> pd.DataFrame:
     remove_index(dframe)
     cols = list(dframe.columns)
@@ -163,83 +396,200 @@ def remove_index(df: pd.DataFrame) -> pd.DataFrame:
 #########################################
 # I/O:
 
+CHUNK_SIZE = 100000
+
+TSV_READ_OPTIONS = {
+    "sep": "\t",
+    "quotechar": "\\",
+    "doublequote": False,
+    "parse_dates": True,
+    "infer_datetime_format": True,
+    "float_precision": "round_trip",
+    "header": 0,
+}
+
 
 class DataFrameIO:
     src: str = "data/src"
     gen: str = "data/gen"
-    processing_log: pd.DataFrame | None = None
+    processing_log: FrameBuilder | None = None
+    # Formats written by write_df: see WRITE_FORMATS.
+    write_formats: List[str] = ["pickle.xz", "tsv", "html", "json", "md"]
+    # If > 1, write formats concurrently on a pool of write_workers:
+    write_workers: int = 1
+    write_processes: bool = False
+    # If True, read_tsv and read_json call optimize_dtypes:
+    read_optimize: bool = False
+    # write_html uses the virtual html.Table for frames of this many rows:
+    html_virtual_rows: int = 50000
 
     def initialize_log(self) -> None:
-        self.processing_log = pd.DataFrame(
-            columns=["report", "file", "mtime", "lines", "bytes", "now", "url"]
+        self.processing_log = FrameBuilder(
+            [
+                "report",
+                "file",
+                "mtime",
+                "lines",
+                "bytes",
+                "elapsed_ms",
+                "now",
+                "url",
+            ]
         )
 
     def write_logs(self, basename: str) -> None:
-        if self.processing_log and not self.processing_log.empty:
-            self.processing_log.sort_values(by=["report"], ascending=True, inplace=True)
-            self.write_df(self.processing_log, f"00-{basename}-log")
+        if self.processing_log is not None and not self.processing_log.empty:
+            log = self.processing_log.to_frame()
+            log.sort_values(by=["report"], ascending=True, inplace=True)
+            self.write_df(log, f"00-{basename}-log")
 
     def read_pickle(self, file: str, **kwargs) -> pd.DataFrame:
         return pd.read_pickle(file, compression="xz", **kwargs)
 
-    def read_tsv(self, file: str, **_kwargs) -> pd.DataFrame:
-        return pd.read_table(
+    def read_tsv(
+        self, file: str, optimize: bool | None = None, **_kwargs
+    ) -> pd.DataFrame:
+        return self.read_optimized(pd.read_table(file, **TSV_READ_OPTIONS), optimize)
+
+    def read_tsv_chunks(
+        self, file: str, chunksize: int = CHUNK_SIZE, dtype: Any = None, **_kwargs
+    ) -> Iterator[pd.DataFrame]:
+        "Yields DataFrames of up to chunksize rows.  See conform_chunks."
+        with pd.read_table(
+            file, chunksize=chunksize, dtype=dtype, **TSV_READ_OPTIONS
+        ) as reader:
+            yield from conform_chunks(reader)
+
+    def read_json(
+        self, file: str, optimize: bool | None = None, **_kwargs
+    ) -> pd.DataFrame:
+        dframe = pd.read_json(file, orient="records", convert_dates=True)
+        return self.read_optimized(dframe, optimize)
+
+    def read_optimized(
+        self, dframe: pd.DataFrame, optimize: bool | None
+    ) -> pd.DataFrame:
+        "See optimize_dtypes."
+        if optimize is None:
+            optimize = self.read_optimize
+        if not optimize:
+            return dframe
+        optimized = optimize_dtypes(dframe)
+        logging.info("read_optimized :\n%s", dtype_savings(dframe, optimized))
+        return optimized
+
+    def read_json_chunks(
+        self,
+        file: str,
+        chunksize: int = CHUNK_SIZE,
+        dtype: Dict[str, Any] | None = None,
+        **_kwargs,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields DataFrames of up to chunksize records,
+        from a JSON array of records or JSON lines.
+        Dates are not converted.  See conform_chunks.
+        """
+        with open(file, "r", encoding="utf-8") as input_io:
+            records = batched(iter_json_values(input_io), chunksize)
+            yield from conform_chunks(map(pd.DataFrame.from_records, records), dtype)
+
+    def read_parquet(
+        self,
+        file: str,
+        columns: List[str] | None = None,
+        filters: Any = None,
+        memory_map: bool = True,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Reads only columns, if given.
+        Row groups not matching filters are skipped:
+        e.g. [("name", "==", "a"), ("value", ">", 2)].
+        Requires pyarrow.
+        """
+        return pd.read_parquet(
             file,
-            sep="\t",
-            quotechar="\\",
-            doublequote=False,
-            parse_dates=True,
-            infer_datetime_format=True,
-            float_precision="round_trip",
-            header=0,
+            engine="pyarrow",
+            columns=columns,
+            filters=filters,
+            memory_map=memory_map,
+            **kwargs,
         )
 
-    def read_json(self, file: str, **_kwargs) -> pd.DataFrame:
-        return pd.read_json(file, orient="records", convert_dates=True)
+    def read_feather(
+        self,
+        file: str,
+        columns: List[str] | None = None,
+        memory_map: bool = True,
+        **kwargs,
+    ) -> pd.DataFrame:
+        "Reads only columns, if given.  Requires pyarrow."
+        table = pyarrow_feather.read_table(
+            file, columns=columns, memory_map=memory_map, **kwargs
+        )
+        return table.to_pandas()
 
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
     def write_df(
         self,
         dframe: pd.DataFrame,
         report: str,
         dirpath: str | None = None,
+        formats: Iterable[str] | None = None,
+        workers: int | None = None,
         **_kwargs,
     ) -> pd.DataFrame:
         remove_index(dframe)
         file = f"{(dirpath or self.gen)}/{report}"
+        formats = list(formats or self.write_formats)
+        workers = workers or self.write_workers
         msg = f"write_df : {file}.* : {len(dframe)} rows"
         logging.info("###########################################")
         logging.info("%s", f"{msg} : ...")
         logging.info("%s", f"{msg} : columns {dframe.columns!r}")
         logging.info(dframe)
-        self.saving_df(self.write_pickle, dframe, report, f"{file}.pickle.xz")
-        self.saving_df(self.write_tsv, dframe, report, f"{file}.tsv")
-        self.saving_df(self.write_html, dframe, report, f"{file}.html")
-        self.saving_df(self.write_json, dframe, report, f"{file}.json")
-        self.saving_df(self.write_md, dframe, report, f"{file}.md")
+        jobs = [(getattr(self, WRITE_FORMATS[fmt]), f"{file}.{fmt}") for fmt in formats]
+        if workers > 1 and len(jobs) > 1:
+            timed_jobs = [
+                (out, (self.write_timed, fun, dframe, out)) for fun, out in jobs
+            ]
+            for out, write_ms in run_many(timed_jobs, workers, self.write_processes):
+                self.saved_df(dframe, report, out, write_ms)
+        else:
+            for fun, out in jobs:
+                self.saving_df(fun, dframe, report, out)
         logging.info("%s", f"{msg} : DONE\n")
         return dframe
 
     def saving_df(
         self, fun: Callable, dframe: pd.DataFrame, report: str, file: str
     ) -> str:
+        write_ms = self.write_timed(fun, dframe, file)
+        return self.saved_df(dframe, report, file, write_ms)
+
+    def write_timed(self, fun: Callable, dframe: pd.DataFrame, file: str) -> float:
         logging.info("%s", f"Saving {file} : ...")
-        fun(dframe, file)
-        if self.processing_log and dframe is not self.processing_log:
-            log_row = self.saving_df_log(report, file)
-            push_row(self.processing_log, log_row)
+        return elapsed_ms(fun, dframe, file)[1]
+
+    def saved_df(
+        self, dframe: pd.DataFrame, report: str, file: str, write_ms: float
+    ) -> str:
+        log = self.processing_log
+        if log is not None and dframe is not log.frame:
+            log.append(self.saving_df_log(report, file) | {"elapsed_ms": write_ms})
         return file
 
     def saving_df_log(self, report: str, file: str) -> dict:
         file_name = Path(file).name
+        line_count = file_line_count(file)
+        assert line_count
         log_row = {
             "report": report,
             "file": file_name,
             "mtime": datetime.fromtimestamp(os.path.getmtime(file)),
-            "bytes": os.path.getsize(file),
-            # https://stackoverflow.com/questions/9629179/python-counting-lines-in-a-huge-10gb-file-as-fast-as-possible
-            "lines": int(
-                subprocess.check_output(["/usr/bin/wc", "-l", file]).split()[0]
-            ),
+            "bytes": line_count.bytes,
+            "lines": line_count.lines,
             "now": datetime.now(),
         }
         logging.info("%s", f"Saving {file} : {log_row!r}")
@@ -256,14 +606,177 @@ class DataFrameIO:
     def write_json(self, dframe: pd.DataFrame, file: str, **_kw) -> None:
         dframe.to_json(file, orient="records", date_format="iso", indent=2)
 
+    def write_parquet(self, dframe: pd.DataFrame, file: str, **kwargs) -> None:
+        "See pyarrow.parquet.write_table for kwargs: e.g. row_group_size."
+        dframe.to_parquet(file, engine="pyarrow", index=False, **kwargs)
+
+    def write_feather(self, dframe: pd.DataFrame, file: str, **kwargs) -> None:
+        dframe.to_feather(file, **kwargs)
+
     def write_md(self, dframe: pd.DataFrame, file: str, **kw) -> None:
         dframe.to_markdown(file, index=False, **kw)
 
-    def write_html(self, dframe: Any, file: str, **kwargs) -> None:
+    def write_html(self, dframe: pd.DataFrame, file: str, **kwargs) -> None:
+        "Rows are streamed to file.  See html.Table for kwargs."
+        kwargs = {"virtual": len(dframe) >= self.html_virtual_rows} | kwargs
+        columns = list(dframe.columns)
+        col_opts = {
+            col: {"type": str(dtype), "numeric": is_numeric(dtype)}
+            for col, dtype in dframe.dtypes.items()
+        }
+        for col, opts in kwargs.get("columns", {}).items():
+            col_opts[col] = col_opts.get(col, {}) | opts
         with open(file, "w", encoding="utf-8") as output:
             Table(
-                columns=dframe.columns(),
-                rows=dframe.as_iterable(),
-                options=kwargs,
+                columns=columns,
+                rows=DataFrameRecords(dframe),
+                options=kwargs | {"columns": col_opts},
                 output=output,
             ).render()
+
+
+def conform_chunks(
+    chunks: Iterable[pd.DataFrame], dtype: Dict[str, Any] | None = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Casts each chunk to the columns and dtypes of the first chunk,
+    with dtype overriding the dtypes of its columns.
+    Columns missing from a chunk are NA.
+    Raises ValueError if a chunk has a new column,
+    or a column that cannot be cast without loss:
+    e.g. a column of ints in the first chunk with NAs in a later one.
+    Pass an explicit dtype, e.g. {"col": "float64"}, to avoid this.
+    """
+    schema: Dict[str, Any] = {}
+    for index, chunk in enumerate(chunks):
+        if not schema:
+            schema = chunk.dtypes.to_dict() | (dtype or {})
+        else:
+            added = [col for col in chunk.columns if col not in schema]
+            if added:
+                raise ValueError(f"conform_chunks: chunk {index}: new columns {added}")
+            chunk = chunk.reindex(columns=list(schema))
+            for col, col_dtype in chunk.dtypes.items():
+                if col_dtype != schema[col] and not can_cast(col_dtype, schema[col]):
+                    raise ValueError(
+                        f"conform_chunks: chunk {index}: column {col!r}: "
+                        f"cannot cast {col_dtype} to {schema[col]}: pass dtype"
+                    )
+        yield chunk.astype(schema, copy=False)
+
+
+def can_cast(from_dtype: Any, to_dtype: Any) -> bool:
+    "Without loss: e.g. int to float, anything to object."
+    if to_dtype == np.dtype(object):
+        return True
+    try:
+        return np.can_cast(from_dtype, to_dtype, casting="safe")
+    except TypeError:
+        return False
+
+
+JSON_DELIMITERS = frozenset(" \t\r\n,]}")
+# Characters read to find the end of a leading array: see iter_json_values.
+JSON_ARRAY_LOOKAHEAD = 1 << 20
+
+
+def iter_json_values(
+    input_io: TextIO,
+    read_size: int = 1 << 16,
+    lookahead: int = JSON_ARRAY_LOOKAHEAD,
+) -> Iterator[Any]:
+    """
+    Yields each value of a top-level JSON array, or of a JSON lines stream,
+    without reading the whole stream.
+    A leading array is the top-level array only if it is the whole document.
+    If it does not end within lookahead characters, its values are streamed:
+    raises ValueError if anything follows it.
+    """
+    decoder = json.JSONDecoder()
+    separators = re.compile(r"[\s,]*")
+    buf, pos, eof = "", 0, False
+    # "first": before the first value, "array": in the top-level array,
+    # "end": after it, "lines": in a stream of values.
+    state = "first"
+    # A complete leading array: unwrapped if nothing follows it.
+    leading: list | None = None
+    while True:
+        pos = separators.match(buf, pos).end()  # type: ignore
+        if pos < len(buf):
+            if leading is not None:
+                yield leading
+                leading = None
+            if state == "end":
+                raise ValueError("iter_json_values: data after top-level array")
+            if state == "array" and buf[pos] == "]":
+                state = "end"
+                pos += 1
+                continue
+        try:
+            if pos == len(buf):
+                raise json.JSONDecodeError("more", buf, pos)
+            value, end = decoder.raw_decode(buf, pos)
+            # A value must be followed by a delimiter or EOF:
+            # a number may continue in the next read, e.g. "12" then ".5".
+            if not eof and (end == len(buf) or buf[end] not in JSON_DELIMITERS):
+                raise json.JSONDecodeError("more", buf, pos)
+        except json.JSONDecodeError:
+            if state == "first" and buf[pos : pos + 1] == "[":
+                if len(buf) - pos >= lookahead:
+                    state = "array"
+                    pos += 1
+                    continue
+            if eof:
+                if pos == len(buf):
+                    yield from leading or ()
+                    return
+                raise
+            data = input_io.read(read_size)
+            eof = not data
+            buf, pos = buf[pos:] + data, 0
+            continue
+        if state == "first":
+            state = "lines"
+            if buf[pos] == "[":
+                leading, pos = value, end
+                continue
+        yield value
+        pos = end
+
+
+def is_numeric(dtype: Any) -> bool:
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(
+        dtype
+    )
+
+
+class DataFrameRecords(Sequence):
+    "A read-only Sequence of the rows of a DataFrame as dicts."
+
+    def __init__(self, dframe: pd.DataFrame) -> None:
+        self.dframe = dframe
+
+    def __len__(self) -> int:
+        return len(self.dframe)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return list(DataFrameRecords(self.dframe.iloc[index]))
+        return self.dframe.iloc[index].to_dict()
+
+    def __iter__(self) -> Iterator[dict]:
+        columns = list(self.dframe.columns)
+        for values in self.dframe.itertuples(index=False, name=None):
+            yield dict(zip(columns, values))
+
+
+# Format suffix: DataFrameIO method.
+WRITE_FORMATS = {
+    "pickle.xz": "write_pickle",
+    "tsv": "write_tsv",
+    "html": "write_html",
+    "json": "write_json",
+    "md": "write_md",
+    "parquet": "write_parquet",
+    "feather": "write_feather",
+}
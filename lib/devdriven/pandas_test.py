@@ -0,0 +1,237 @@
+import io
+import tempfile
+import pytest
+from . import pandas as sut
+
+
+def make_dataframe():
+    return sut.pd.DataFrame(
+        {
+            "name": ["a", "b", "a", "c"],
+            "value": [2, 3, 5, 7],
+        }
+    )
+
+
+def test_write_df():
+    formats = ["pickle.xz", "tsv", "json", "md", "html"]
+    for workers in (1, 4):
+        with tempfile.TemporaryDirectory() as tmp:
+            dfio = sut.DataFrameIO()
+            dfio.initialize_log()
+            dframe = make_dataframe()
+            dfio.write_df(dframe, "report", tmp, formats=formats, workers=workers)
+            log = dfio.processing_log.to_frame()
+            assert sorted(log["file"]) == sorted(f"report.{fmt}" for fmt in formats)
+            assert (log["elapsed_ms"] >= 0).all()
+            assert dict(zip(log["file"], log["lines"]))["report.tsv"] == 5
+            assert dfio.read_pickle(f"{tmp}/report.pickle.xz").equals(dframe)
+            assert dfio.read_json(f"{tmp}/report.json").equals(dframe)
+            with open(f"{tmp}/report.html", encoding="utf-8") as html:
+                assert html.read().count("</tr>") == 4
+            dfio.html_virtual_rows = 4
+            dfio.write_html(dframe, f"{tmp}/virtual.html")
+            with open(f"{tmp}/virtual.html", encoding="utf-8") as html:
+                assert html.read().count("cx_rows.push(") == 1
+            dfio.gen, dfio.write_formats = tmp, formats
+            dfio.write_logs("test")
+            assert len(dfio.processing_log) == len(formats)
+            assert len(dfio.read_pickle(f"{tmp}/00-test-log.pickle.xz")) == len(formats)
+
+
+def test_frame_builder():
+    builder = sut.FrameBuilder(["name", "value"])
+    assert builder.empty
+    builder.append({"value": 2, "name": "a"}).extend([("b", 3), ["a", 5]])
+    builder.append({"name": "c", "value": 7})
+    assert not builder.empty
+    frame = builder.to_frame()
+    assert frame.equals(make_dataframe())
+    assert builder.to_frame() is frame
+    builder.append({"name": "d"})
+    assert len(builder) == 5
+    assert builder.to_frame()["value"].isna().tolist() == [False] * 4 + [True]
+
+
+def test_write_df_columnar():
+    pytest.importorskip("pyarrow")
+    with tempfile.TemporaryDirectory() as tmp:
+        dfio = sut.DataFrameIO()
+        dframe = make_dataframe()
+        dfio.write_df(dframe, "report", tmp, formats=["parquet", "feather"])
+        for read in (dfio.read_parquet, dfio.read_feather):
+            file = f"{tmp}/report.{read.__name__.removeprefix('read_')}"
+            assert read(file).equals(dframe)
+            assert read(file, columns=["value"]).equals(dframe[["value"]])
+        dfio.write_parquet(dframe, f"{tmp}/groups.parquet", row_group_size=2)
+        actual = dfio.read_parquet(
+            f"{tmp}/groups.parquet", filters=[("value", ">", 4)], memory_map=False
+        )
+        assert list(actual["value"]) == [5, 7]
+
+
+def make_chunks(dframe, size):
+    return (dframe.iloc[i : i + size] for i in range(0, len(dframe), size))
+
+
+def test_summarize_chunks():
+    dframe = make_dataframe().assign(x=[1.0, None, 2.0, 3.0])
+    col_agg_funs = [("value", ["sum", "avg", "count", "min"]), ("x", ["max", "mean"])]
+    for group_by in (None, ["name"]):
+        expected = sut.summarize(dframe, col_agg_funs, group_by)
+        actual = sut.summarize_chunks(make_chunks(dframe, 3), col_agg_funs, group_by)
+        sut.pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    expected = sut.count_by(dframe, "name", sort_ascending=False)
+    actual = sut.count_by_chunks(make_chunks(dframe, 1), "name", sort_ascending=False)
+    sut.pd.testing.assert_frame_equal(actual, expected)
+    expected = sut.summary_by(dframe, ["name"], "value", "total", "t")
+    actual = sut.summary_by_chunks(
+        make_chunks(dframe, 2), ["name"], "value", "total", "t"
+    )
+    sut.pd.testing.assert_frame_equal(actual, expected)
+    with pytest.raises(ValueError):
+        sut.summarize_chunks(make_chunks(dframe, 2), [("value", ["median"])])
+
+
+def test_read_chunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        dfio = sut.DataFrameIO()
+        dframe = make_dataframe()
+        dfio.write_df(dframe, "report", tmp, formats=["tsv", "json"])
+        for read in (dfio.read_tsv_chunks, dfio.read_json_chunks):
+            file = f"{tmp}/report.{read.__name__.split('_')[1]}"
+            chunks = list(read(file, chunksize=3))
+            assert [len(chunk) for chunk in chunks] == [3, 1]
+            assert sut.pd.concat(chunks).reset_index(drop=True).equals(dframe)
+        with open(f"{tmp}/lines.json", "w", encoding="utf-8") as output:
+            output.write('{"a": 1}\n{"a": 2}\n{"a": 3.5}\n')
+        with pytest.raises(ValueError, match="column 'a'"):
+            list(dfio.read_json_chunks(f"{tmp}/lines.json", chunksize=2))
+        chunks = list(
+            dfio.read_json_chunks(
+                f"{tmp}/lines.json", chunksize=2, dtype={"a": "float64"}
+            )
+        )
+        assert [str(chunk["a"].dtype) for chunk in chunks] == ["float64", "float64"]
+        assert [list(chunk["a"]) for chunk in chunks] == [[1.0, 2.0], [3.5]]
+        with open(f"{tmp}/lines.json", "w", encoding="utf-8") as output:
+            output.write('{"a": 1.5}\n{"a": 2}\n{"a": 3}\n')
+        chunks = list(dfio.read_json_chunks(f"{tmp}/lines.json", chunksize=2))
+        assert [list(chunk["a"]) for chunk in chunks] == [[1.5, 2.0], [3.0]]
+        assert str(chunks[1]["a"].dtype) == "float64"
+
+
+def test_conform_chunks():
+    chunks = [
+        sut.pd.DataFrame({"i": [1.5, 2], "s": [None, None]}),
+        sut.pd.DataFrame({"i": [3, 4], "s": ["a", None]}),
+        sut.pd.DataFrame({"s": [1.5, 2.5]}),
+    ]
+    actual = list(sut.conform_chunks(chunks))
+    assert [str(chunk["i"].dtype) for chunk in actual] == ["float64"] * 3
+    assert [str(chunk["s"].dtype) for chunk in actual] == ["object"] * 3
+    assert list(actual[1]["s"])[0] == "a"
+    assert actual[2]["i"].isna().all()
+    chunks = [
+        sut.pd.DataFrame({"i": [1, 2]}),
+        sut.pd.DataFrame({"i": [3, None]}),
+    ]
+    with pytest.raises(ValueError, match="chunk 1: column 'i'"):
+        list(sut.conform_chunks(chunks))
+    actual = list(sut.conform_chunks(chunks, {"i": "float64"}))
+    assert [str(chunk["i"].dtype) for chunk in actual] == ["float64"] * 2
+    chunks = [
+        sut.pd.DataFrame({"x": [float("nan")]}),
+        sut.pd.DataFrame({"x": ["a"]}),
+    ]
+    with pytest.raises(ValueError, match="cannot cast object to float64"):
+        list(sut.conform_chunks(chunks))
+    chunks = [
+        sut.pd.DataFrame({"x": [1]}),
+        sut.pd.DataFrame({"x": [2], "y": ["b"]}),
+    ]
+    with pytest.raises(ValueError, match=r"new columns \['y'\]"):
+        list(sut.conform_chunks(chunks))
+
+
+def test_iter_json_values():
+    fut = sut.iter_json_values
+    text = '[{"a": [1, 2]}, 12345, "x,]" , null]'
+    for read_size in (1, 3, 1000):
+        for lookahead in (1, 8, 1000):
+            assert list(fut(io.StringIO(text), read_size, lookahead)) == [
+                {"a": [1, 2]},
+                12345,
+                "x,]",
+                None,
+            ]
+    assert list(fut(io.StringIO("1\n 22\n"), 1)) == [1, 22]
+    for read_size in (1, 2, 4):
+        for lookahead in (1, 4, 1000):
+            assert list(fut(io.StringIO("[12.5, 3e2]"), read_size, lookahead)) == [
+                12.5,
+                300.0,
+            ]
+    assert not list(fut(io.StringIO(" [ ] "), 2))
+    with pytest.raises(ValueError):
+        list(fut(io.StringIO("[1, {"), 2))
+    # JSON lines of arrays:
+    for read_size in (1, 3, 1000):
+        assert list(fut(io.StringIO("[1,2]\n[3]\n"), read_size)) == [[1, 2], [3]]
+        assert list(fut(io.StringIO("[]\n{}\n"), read_size)) == [[], {}]
+    with pytest.raises(ValueError, match="after top-level array"):
+        list(fut(io.StringIO("[1,2]\n[3]\n"), 1, 2))
+
+
+def test_optimize_dtypes():
+    dframe = sut.pd.DataFrame(
+        {
+            "name": ["a", "b", "a", "a"] * 4,
+            "id": [f"id-{i}" for i in range(16)],
+            "value": [2, 3, 5, 700] * 4,
+            "half": [0.5, 1.5, None, 2.25] * 4,
+            "third": [1 / 3, 1.0, 2.0, 3.0] * 4,
+            "flag": [True, False] * 8,
+        }
+    )
+    actual = sut.optimize_dtypes(dframe)
+    assert sut.column_type_names(actual) == {
+        "name": "category",
+        "id": "object",
+        "value": "int16",
+        "half": "float32",
+        "third": "float64",
+        "flag": "bool",
+    }
+    assert actual.astype(dframe.dtypes).equals(dframe)
+    report = sut.dtype_savings(dframe, actual).set_index("column")
+    assert report.loc["name", "bytes_after"] < report.loc["name", "bytes_before"]
+    assert report.loc["value", "bytes_after"] * 4 == report.loc["value", "bytes_before"]
+    assert report.loc["flag", "ratio"] == 1
+    with tempfile.TemporaryDirectory() as tmp:
+        dfio = sut.DataFrameIO()
+        dfio.write_tsv(dframe, f"{tmp}/df.tsv")
+        assert dfio.read_tsv(f"{tmp}/df.tsv")["value"].dtype == "int64"
+        assert dfio.read_tsv(f"{tmp}/df.tsv", optimize=True)["value"].dtype == "int16"
+
+
+def test_optimize_dtypes_nested():
+    dframe = sut.pd.DataFrame(
+        {
+            "tags": [["a"], ["a", "b"], ["a"], []],
+            "attrs": [{"k": 1}, {}, {"k": 1}, {}],
+            "name": ["a", None, "a", "a"],
+        }
+    )
+    actual = sut.optimize_dtypes(dframe)
+    assert sut.column_type_names(actual) == {
+        "tags": "object",
+        "attrs": "object",
+        "name": "category",
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(f"{tmp}/df.json", "w", encoding="utf-8") as output:
+            output.write('[{"tags": ["a", "b"], "n": 1}, {"tags": [], "n": 2}]')
+        actual = sut.DataFrameIO().read_json(f"{tmp}/df.json", optimize=True)
+        assert actual["tags"].to_list() == [["a", "b"], []]
+        assert actual["n"].dtype == "int8"
@@ -1,7 +1,9 @@
-from typing import Any, List, Sequence, Self
+from typing import Any, List, Sequence, Self, Tuple
+import os
 from pathlib import Path
 from dataclasses import dataclass, field
 import importlib.util
+from .util import memoize
 
 Pathish = Path | str
 PathishMaybe = Pathish | None
@@ -24,8 +26,14 @@ class Resources:
             raise Exception(
                 f"cannot locate resource {names!r} in {self.search_paths!r}"
             )
-        with open(file, "r", encoding=encoding) as file:
-            return file.read()
+        try:
+            return read_file(file, encoding)
+        except FileNotFoundError:
+            # Resolved path was removed:
+            _find_all_cached.cache_clear()
+            if file == self.find(names, None):
+                raise
+            return self.read(names, default, encoding)
 
     def find(self, names: Paths, default=None) -> Any:
         if paths := self.find_all(names):
@@ -33,12 +41,18 @@ class Resources:
         return default
 
     def find_all(self, names: Paths) -> Sequence[Path]:
-        def path_names(path):
-            path = Path(path)
-            path_names = [path.joinpath(name) for name in names if name]
-            return [str(p) for p in path_names if p.is_file()]
+        """
+        Resolved paths are cached for the process.
+        See Resources.cache_clear.
+        """
+        key = (os.getcwd(), tuple(self.search_paths), tuple(map(str, names)))
+        return list(_find_all_cached(*key))
 
-        return sum(map(path_names, self.search_paths), [])
+    @staticmethod
+    def cache_clear() -> None:
+        "Forgets resolved paths and contents: e.g. after adding files."
+        _find_all_cached.cache_clear()
+        _read_file_cached.cache_clear()
 
     def module_path(self, module_name: str) -> Path:
         if spec := importlib.util.find_spec(module_name, None):
@@ -63,3 +77,30 @@ class Resources:
             path = path / rel
         self.search_paths.append(str(path))
         return self
+
+
+RESOURCE_CACHE_SIZE = 1000
+
+
+def read_file(file: Pathish, encoding: str | None = None) -> str:
+    "Contents are cached for the process by (path, size, mtime_ns)."
+    stat = os.stat(file)
+    return _read_file_cached(str(file), encoding, stat.st_size, stat.st_mtime_ns)
+
+
+@memoize(maxsize=RESOURCE_CACHE_SIZE)
+def _read_file_cached(file: str, encoding: str | None, _size: int, _mtime: int) -> str:
+    with open(file, "r", encoding=encoding) as input_io:
+        return input_io.read()
+
+
+@memoize(maxsize=RESOURCE_CACHE_SIZE)
+def _find_all_cached(
+    _cwd: str, search_paths: Tuple[str, ...], names: Tuple[str, ...]
+) -> Tuple[str, ...]:
+    def path_names(path):
+        path = Path(path)
+        path_names = [path.joinpath(name) for name in names if name]
+        return [str(p) for p in path_names if p.is_file()]
+
+    return tuple(sum(map(path_names, search_paths), []))
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from .resource import Resources
 
 
@@ -12,3 +14,29 @@ def test_resources():
         resources.find(["devdriven/data/actual.txt"])
         == "tests/devdriven/data/actual.txt"
     )
+
+
+def test_resources_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(f"{tmp}/a")
+        os.makedirs(f"{tmp}/b")
+        resources = Resources(search_paths=[f"{tmp}/a", f"{tmp}/b"])
+        write(f"{tmp}/b/x.txt", "b-1")
+        assert resources.read(["x.txt"]) == "b-1"
+        write(f"{tmp}/b/x.txt", "b-22")
+        assert resources.read(["x.txt"]) == "b-22"
+        write(f"{tmp}/a/x.txt", "a")
+        assert resources.read(["x.txt"]) == "b-22"
+        Resources.cache_clear()
+        assert resources.read(["x.txt"]) == "a"
+        os.unlink(f"{tmp}/a/x.txt")
+        assert resources.read(["x.txt"]) == "b-22"
+        os.unlink(f"{tmp}/b/x.txt")
+        assert resources.read(["x.txt"], "none") == "none"
+
+
+def write(file, content):
+    with open(file, "w", encoding="utf-8") as output:
+        output.write(content)
+    stat = os.stat(file)
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + len(content)))
@@ -0,0 +1,26 @@
+var cx_virtual_table=function(table_id,columns,rows,options){var overscan=20;var row_height=options.row_height||24;var row_height_measured=!!options.row_height;var dom_table=document.getElementById(table_id);var dom_tbody=dom_table.tBodies[0];var dom_scroll=document.createElement('div');var dom_filter_input=document.getElementById('cx-filter-input');var dom_matched_row_count=dom_table.querySelector('.cx-filter-matched-row-count');var all_idxs=rows.map(function(_row,i){return i;});var view=all_idxs;var row_texts=[];var sort_col=null,sort_desc=false;var first=-1,last=-1,frame_requested=false;function set_cell(td,value,col){if(value===null||value===undefined){if(col.none_as!==null){td.innerHTML=col.none_as;return;}
+value='None';}else if(typeof value==='number'&&isNaN(value)){if(col.nan_as!==null){td.innerHTML=col.nan_as;return;}
+value='nan';}else if(col.links&&/^(https?|ftps?):\/\//.test(String(value).trim())){var a=document.createElement('a');a.href=String(value).trim();a.target='_new';a.rel='noopener noreferrer';a.textContent=a.href;td.appendChild(a);return;}
+if(col.raw){td.innerHTML=String(value);}else{td.textContent=String(value);}}
+function render_row(idx){var row=rows[idx];var tr=document.createElement('tr');tr.title=(idx+1)+' / '+rows.length;if(options.row_index){var td=document.createElement('td');td.className='cx-right';td.textContent=idx+1;tr.appendChild(td);}
+for(var c=0;c<columns.length;c++){var td=document.createElement('td');if(columns[c].td_class){td.className=columns[c].td_class;}
+set_cell(td,row[c],columns[c]);tr.appendChild(td);}
+return tr;}
+function spacer(height){var tr=document.createElement('tr');tr.className='cx-virtual-spacer';tr.style.height=height+'px';return tr;}
+function render(){frame_requested=false;var top=dom_scroll.scrollTop;var height=dom_scroll.clientHeight||window.innerHeight;var start=Math.max(0,Math.floor(top/row_height)-overscan);var end=Math.min(view.length,Math.ceil((top+height)/row_height)+overscan);if(start===first&&end===last){return;}
+first=start;last=end;var fragment=document.createDocumentFragment();fragment.appendChild(spacer(start*row_height));for(var i=start;i<end;i++){fragment.appendChild(render_row(view[i]));}
+fragment.appendChild(spacer((view.length-end)*row_height));dom_tbody.replaceChildren(fragment);if(!row_height_measured&&end>start){row_height_measured=true;var measured=dom_tbody.rows[1].offsetHeight;if(measured&&measured!==row_height){row_height=measured;first=-1;render();}}}
+function request_render(){if(!frame_requested){frame_requested=true;window.requestAnimationFrame(render);}}
+function refresh(){first=-1;dom_scroll.scrollTop=0;if(dom_matched_row_count){dom_matched_row_count.textContent=view.length;}
+render();}
+function is_missing(x){return x===null||x===undefined||(typeof x==='number'&&isNaN(x));}
+function compare(x,y){if(x===y)return 0;if(is_missing(x))return 1;if(is_missing(y))return-1;if(typeof x==='number'&&typeof y==='number')return x-y;x=String(x).toLowerCase();y=String(y).toLowerCase();return x<y?-1:(x>y?1:0);}
+function sort_view(){if(sort_col===null){view.sort(function(a,b){return a-b;});return;}
+var c=sort_col,sign=sort_desc?-1:1;view.sort(function(a,b){return sign*compare(rows[a][c],rows[b][c])||a-b;});}
+function sort_by(c){sort_desc=sort_col===c?!sort_desc:false;sort_col=c;sort_view();refresh();}
+function row_text(idx){var text=row_texts[idx];if(text===undefined){text=row_texts[idx]=rows[idx].join('\u0001').toLowerCase();}
+return text;}
+function filter(query){var terms=query.toLowerCase().split(/\s+/).filter(Boolean);view=all_idxs.filter(function(idx){var text=row_text(idx);return terms.every(function(term){return text.indexOf(term)>=0;});});sort_view();refresh();}
+dom_scroll.className='cx-virtual-scroll';dom_scroll.style.overflowY='auto';dom_scroll.style.maxHeight=options.max_height||'80vh';dom_table.parentNode.insertBefore(dom_scroll,dom_table);dom_scroll.appendChild(dom_table);dom_scroll.addEventListener('scroll',request_render);window.addEventListener('resize',request_render);if(options.sorting){var ths=dom_table.querySelectorAll('tr.cx-columms th');var offset=options.row_index?1:0;ths.forEach(function(th,i){th.style.cursor='pointer';th.addEventListener('click',function(){sort_by(i<offset?null:i-offset);});});}
+render();return{filter:filter,sort_by:sort_by,filter_rows:function(event){filter(event.target.value);},clear_filter:function(){if(dom_filter_input){dom_filter_input.value='';}
+filter('');},};};
\ No newline at end of file
@@ -1,6 +1,17 @@
+from typing import Any, Callable, IO, Iterable, Iterator, List, Tuple
 import csv
 import json
+import heapq
+import operator
+import pickle
+import hashlib
+import sqlite3
+import tempfile
+from io import StringIO
+from itertools import chain, islice
+from contextlib import ExitStack
 import tabulate
+from .util import batched, hashable_key
 
 
 def formatter(output, fmt, **kwargs):
@@ -12,10 +23,15 @@ def formatter(output, fmt, **kwargs):
         return JSONFormatter(output, fmt, **kwargs)
     if kwargs.get("field_sep"):
         return RecordFormatter(output, fmt, **kwargs)
+    if kwargs.get("streaming"):
+        return StreamingTabularFormatter(output, fmt, **kwargs)
     return TabularFormatter(output, fmt, **kwargs)
 
 
 class Formatter:
+    # Rows joined per output.write:
+    rows_per_write: int = 1000
+
     def __init__(self, output, fmt, field_sep=None, record_sep=None, **kwargs):
         self.output = output
         self.format = fmt
@@ -41,17 +57,31 @@ class Formatter:
 
 class RecordFormatter(Formatter):
     def write(self, rows, fields):
+        buffer = StringIO()
         writer = csv.writer(
-            self.output,
+            buffer,
             delimiter=self.field_sep,
             lineterminator=(self.record_sep or "\n"),
         )
         writer.writerow(fields)
-        for row in rows:
-            writer.writerow(extract_record(row, fields))
+        get = field_getter(fields)
+        for batch in batched(rows, self.rows_per_write):
+            writer.writerows([map(str, get(row)) for row in batch])
+            self.output.write(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+        self.output.write(buffer.getvalue())
 
 
 class JSONFormatter(Formatter):
+    def write_rows(self, rows, fields):
+        get = field_getter(fields)
+        encode = json.JSONEncoder().encode
+        for batch in batched(rows, self.rows_per_write):
+            lines = [encode(dict(zip(fields, get(row)))) for row in batch]
+            lines.append("")
+            self.output.write("\n".join(lines))
+
     def write_row(self, row, fields):
         json.dump(extract_dict(row, fields), self.output)
         self.output.write("\n")
@@ -65,6 +95,146 @@ class TabularFormatter(Formatter):
         self.output.write("\n")
 
 
+class StreamingTabularFormatter(TabularFormatter):
+    """
+    Writes rows in a tabulate table format as they arrive.
+    Column widths are taken from the first sample_rows rows,
+    or all rows if sample_rows is None.
+    Wider cells are truncated, or wrapped if overflow="wrap".
+    """
+
+    def __init__(
+        self,
+        output,
+        fmt,
+        sample_rows: int | None = 1000,
+        overflow: str = "truncate",
+        **kwargs,
+    ):
+        super().__init__(output, fmt, **kwargs)
+        self.sample_rows = sample_rows
+        self.overflow = overflow
+        # pylint: disable-next=protected-access
+        self.table_format = tabulate._table_formats.get(fmt or "simple")
+
+    def write(self, rows, fields):
+        table_format = self.table_format
+        if not table_format or callable(table_format.datarow):
+            return super().write(rows, fields)
+        rows = iter(rows)
+        get = field_getter(fields)
+
+        def to_record(row):
+            return list(map(str, get(row)))
+
+        sample = [fields] + list(map(to_record, islice(rows, self.sample_rows)))
+        widths = [0] * len(fields)
+        for record in sample:
+            for i, cell in enumerate(record):
+                widths[i] = max(widths[i], cell_width(cell))
+        records = chain(sample, map(to_record, rows))
+        self.write_records(records, widths)
+        return None
+
+    def write_records(self, records, widths: List[int]) -> None:
+        table_format = self.table_format
+        padding = " " * table_format.padding
+        padded_widths = [width + 2 * table_format.padding for width in widths]
+        between = table_line(table_format.linebetweenrows, padded_widths)
+        wrap = self.overflow == "wrap"
+        lines = table_line(table_format.lineabove, padded_widths)
+        for record_idx, record in enumerate(records):
+            if record_idx and between:
+                lines.extend(between)
+            cells = [fit_cell(cell, width, wrap) for cell, width in zip(record, widths)]
+            for line_idx in range(max(map(len, cells))):
+                line = [
+                    padding + cell_line(cell, line_idx).ljust(width) + padding
+                    for cell, width in zip(cells, widths)
+                ]
+                lines.append(table_row(table_format.datarow, line))
+            if record_idx % self.rows_per_write == 0:
+                self.write_lines(lines)
+        lines.extend(table_line(table_format.linebelow, padded_widths))
+        self.write_lines(lines)
+
+    def write_lines(self, lines: List[str]) -> None:
+        if lines:
+            lines.append("")
+            self.output.write("\n".join(lines))
+            lines.clear()
+
+
+def table_line(line: Any, padded_widths: List[int]) -> List[str]:
+    "See tabulate._build_line."
+    if not line:
+        return []
+    if callable(line):
+        return [line(padded_widths, ["left"] * len(padded_widths))]
+    begin, fill, sep, end = line
+    return [table_row((begin, sep, end), [fill * width for width in padded_widths])]
+
+
+def table_row(row: Any, cells: List[str]) -> str:
+    "See tabulate._build_simple_row."
+    begin, sep, end = row
+    return (begin + sep.join(cells) + end).rstrip()
+
+
+def cell_width(cell: str) -> int:
+    if "\n" in cell:
+        return max(map(len, cell.splitlines()), default=0)
+    return len(cell)
+
+
+def fit_cell(cell: str, width: int, wrap: bool) -> List[str]:
+    "Returns the lines of cell, truncated or wrapped to width."
+    if len(cell) <= width and "\n" not in cell:
+        return [cell]
+    lines = cell.splitlines() or [""]
+    if wrap and width:
+        return [
+            line[i : i + width]
+            for line in lines
+            for i in range(0, len(line) or 1, width)
+        ]
+    return [truncate(line, width) for line in lines]
+
+
+def truncate(line: str, width: int) -> str:
+    if len(line) <= width:
+        return line
+    return line[: width - 1] + "…" if width else ""
+
+
+def cell_line(cell: List[str], line_idx: int) -> str:
+    return cell[line_idx] if line_idx < len(cell) else ""
+
+
+def field_getter(fields) -> Callable[[Any], Tuple]:
+    """
+    Returns get(row) -> (row.get(field), ...) for fields.
+    Dict rows with all fields use operator.itemgetter.
+    """
+    fields = list(fields)
+    if len(fields) == 1:
+        field = fields[0]
+        return lambda row: (row.get(field),)
+    if not fields:
+        return lambda _row: ()
+    get_items = operator.itemgetter(*fields)
+
+    def get(row):
+        if type(row) is dict:  # pylint: disable=unidiomatic-typecheck
+            try:
+                return get_items(row)
+            except KeyError:
+                pass
+        return tuple(row.get(field) for field in fields)
+
+    return get
+
+
 def extract_record(row, fields):
     return [str(row.get(field)) for field in fields]
 
@@ -74,11 +244,76 @@ def extract_dict(row, fields):
 
 
 def sort_by(rows, fields):
+    rows.sort(key=sort_key(fields))
+    return rows
+
+
+def sort_key(fields) -> Callable[[Any], List]:
     def row_key(row):
         return [row.get(field, "") for field in fields]
 
-    rows.sort(key=row_key)
-    return rows
+    return row_key
+
+
+#########################################
+# External sort:
+
+# Rows sorted in memory per run:
+SORT_RUN_ROWS = 100000
+# Runs merged at once:
+SORT_MERGE_RUNS = 64
+
+
+def sort_by_external(
+    rows: Iterable[Any],
+    fields,
+    run_rows: int = SORT_RUN_ROWS,
+    tmpdir: str | None = None,
+) -> Iterator[Any]:
+    """
+    Yields rows sorted by fields, like sort_by.
+    At most run_rows rows are held in memory:
+    sorted runs are spilled to temporary files and merged with heapq.merge.
+    Rows must be picklable.  The sort is stable.
+    """
+    key = sort_key(fields)
+    rows = iter(rows)
+    run = sorted(islice(rows, run_rows), key=key)
+    if len(run) < run_rows:
+        yield from run
+        return
+    with ExitStack() as stack:
+        files = []
+        while run:
+            files.append(stack.enter_context(write_run(run, tmpdir)))
+            run.clear()
+            run = sorted(islice(rows, run_rows), key=key)
+        while len(files) > SORT_MERGE_RUNS:
+            merged = []
+            for group in batched(files, SORT_MERGE_RUNS):
+                merged_rows = heapq.merge(*map(read_run, group), key=key)
+                merged.append(stack.enter_context(write_run(merged_rows, tmpdir)))
+                for file in group:
+                    file.close()
+            files = merged
+        yield from heapq.merge(*map(read_run, files), key=key)
+
+
+def write_run(rows: Iterable[Any], tmpdir: str | None) -> IO[bytes]:
+    # pylint: disable-next=consider-using-with
+    file = tempfile.TemporaryFile(dir=tmpdir)
+    for batch in batched(rows, 1000):
+        pickle.dump(batch, file, protocol=pickle.HIGHEST_PROTOCOL)
+    file.seek(0)
+    return file
+
+
+def read_run(file: IO[bytes]) -> Iterator[Any]:
+    while True:
+        try:
+            yield from pickle.load(file)
+        except EOFError:
+            return
 
 
 def uniq_by(seq):
@@ -90,3 +325,114 @@ def uniq_by(seq):
             seen.add(val)
             result.append(elem)
     return result
+
+
+#########################################
+# Uniq by key:
+
+
+def uniq_by_key(
+    seq: Iterable[Any],
+    key: Callable[[Any], Any] | None = None,
+    fields=None,
+    max_keys: int | None = None,
+    tmpdir: str | None = None,
+) -> Iterator[Any]:
+    """
+    Yields the first elem for each distinct key(elem).
+    key defaults to the values of fields, or util.hashable_key(elem).
+    Keys are kept in a set, until there are more than max_keys;
+    then 16-byte digests of the keys are kept in a DiskHashSet.  See key_bytes.
+    """
+    if key is None:
+        key = field_getter(fields) if fields else hashable_key
+    seen: set = set()
+    disk = None
+    try:
+        for elem in seq:
+            elem_key = key(elem)
+            if disk is None:
+                if elem_key in seen:
+                    continue
+                seen.add(elem_key)
+                if max_keys is not None and len(seen) > max_keys:
+                    disk = DiskHashSet(tmpdir)
+                    disk.update(map(key_digest, seen))
+                    seen.clear()
+                yield elem
+            elif disk.add(key_digest(elem_key)):
+                yield elem
+    finally:
+        if disk is not None:
+            disk.close()
+
+
+def key_digest(key: Any) -> bytes:
+    return hashlib.blake2b(key_bytes(key), digest_size=16).digest()
+
+
+# pylint: disable-next=too-many-return-statements
+def key_bytes(key: Any) -> bytes:
+    """
+    A canonical encoding of key: equal keys have equal encodings.
+    Numbers are equal by value: 1, 1.0 and True are the same key.
+    Sets are encoded in a canonical order.
+    Other objects are pickled.
+    """
+    if key is None:
+        return b"N"
+    if isinstance(key, float) and key.is_integer():
+        key = int(key)
+    if isinstance(key, int):
+        return b"i%d" % key
+    if isinstance(key, float):
+        return b"f" + repr(key).encode()
+    if isinstance(key, str):
+        key = key.encode("utf-8", errors="surrogatepass")
+        return b"s%d:%s" % (len(key), key)
+    if isinstance(key, bytes):
+        return b"b%d:%s" % (len(key), key)
+    if isinstance(key, tuple):
+        return key_bytes_seq(b"t", map(key_bytes, key))
+    if isinstance(key, frozenset):
+        return key_bytes_seq(b"S", sorted(map(key_bytes, key)))
+    if isinstance(key, type):
+        return b"T" + f"{key.__module__}.{key.__qualname__}".encode()
+    return b"p" + pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def key_bytes_seq(tag: bytes, items: Iterable[bytes]) -> bytes:
+    return tag + b"".join(b"%d:%s" % (len(item), item) for item in items)
+
+
+class DiskHashSet:
+    "A set of bytes in a temporary sqlite3 database."
+
+    def __init__(self, tmpdir: str | None = None):
+        # pylint: disable-next=consider-using-with
+        self.file = tempfile.NamedTemporaryFile(dir=tmpdir, suffix=".sqlite3")
+        self.db = sqlite3.connect(self.file.name)
+        self.db.execute("PRAGMA journal_mode = OFF")
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.execute("CREATE TABLE keys (key BLOB PRIMARY KEY) WITHOUT ROWID")
+
+    def add(self, key: bytes) -> bool:
+        "Returns True if key was not in the set."
+        cursor = self.db.execute("INSERT OR IGNORE INTO keys VALUES (?)", (key,))
+        return cursor.rowcount == 1
+
+    def update(self, keys: Iterable[bytes]) -> None:
+        self.db.executemany(
+            "INSERT OR IGNORE INTO keys VALUES (?)", ((key,) for key in keys)
+        )
+
+    def __contains__(self, key: bytes) -> bool:
+        cursor = self.db.execute("SELECT 1 FROM keys WHERE key = ?", (key,))
+        return cursor.fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+
+    def close(self) -> None:
+        self.db.close()
+        self.file.close()
@@ -0,0 +1,119 @@
+import os
+import csv
+import tempfile
+import json
+from io import StringIO
+import tabulate
+from . import tablular as sut
+
+FIELDS = ["name", "value"]
+ROWS = [
+    {"name": "a", "value": 1},
+    {"name": "bbb", "value": 22222},
+    {"name": "multi\nline", "value": None},
+]
+
+
+def write(formatter, rows=None, fields=None):
+    formatter.write(
+        ROWS if rows is None else rows, FIELDS if fields is None else fields
+    )
+    return formatter.output.getvalue()
+
+
+def test_streaming_tabular_formatter():
+    for fmt in ("plain", "simple", "grid", "pipe", "github", "psql", "tsv", "rst"):
+        rows = ROWS if fmt in tabulate.multiline_formats else ROWS[:2]
+        expected = write(sut.TabularFormatter(StringIO(), fmt), rows)
+        for sample_rows in (None, len(rows)):
+            actual = sut.StreamingTabularFormatter(
+                StringIO(), fmt, sample_rows=sample_rows
+            )
+            assert write(actual, rows) == expected
+    actual = sut.formatter(StringIO(), "psql", streaming=True)
+    assert isinstance(actual, sut.StreamingTabularFormatter)
+    assert write(sut.StreamingTabularFormatter(StringIO(), "html")) == write(
+        sut.TabularFormatter(StringIO(), "html")
+    )
+
+
+def test_streaming_tabular_formatter_overflow():
+    rows = ROWS[:1] + [{"name": "abcdefghij", "value": 3}]
+    actual = write(
+        sut.StreamingTabularFormatter(StringIO(), "psql", sample_rows=1), rows
+    )
+    assert actual == (
+        "+------+-------+\n"
+        "| name | value |\n"
+        "| a    | 1     |\n"
+        "| abc… | 3     |\n"
+        "+------+-------+\n"
+    )
+    actual = write(
+        sut.StreamingTabularFormatter(
+            StringIO(), "plain", sample_rows=1, overflow="wrap"
+        ),
+        rows,
+    )
+    assert actual == "name  value\na     1\nabcd  3\nefgh\nij\n"
+
+
+class Row:
+    def __init__(self, **kwargs):
+        self.data = kwargs
+
+    def get(self, field):
+        return self.data.get(field)
+
+
+def test_batched_formatters():
+    rows = [*ROWS, {"name": "missing"}, Row(name="row", value=1.5)] * 3
+    for fields in (FIELDS, ["value"], []):
+        expected = StringIO()
+        for row in rows:
+            expected.write(json.dumps(sut.extract_dict(row, fields)) + "\n")
+        formatter = sut.JSONFormatter(StringIO(), "json")
+        formatter.rows_per_write = 4
+        assert write(formatter, rows, fields) == expected.getvalue()
+        expected = StringIO()
+        writer = csv.writer(expected, delimiter=",", lineterminator="\n")
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow(sut.extract_record(row, fields))
+        formatter = sut.formatter(StringIO(), "csv")
+        formatter.rows_per_write = 4
+        assert write(formatter, rows, fields) == expected.getvalue()
+
+
+def test_sort_by_external(monkeypatch):
+    rows = [{"a": i % 7, "b": i % 3, "i": i} for i in range(1000)]
+    expected = sut.sort_by(list(rows), ["a", "b"])
+    with tempfile.TemporaryDirectory() as tmp:
+        for run_rows in (10000, 1000, 99, 1):
+            actual = sut.sort_by_external(rows, ["a", "b"], run_rows, tmp)
+            assert list(actual) == expected
+            assert not os.listdir(tmp)
+        monkeypatch.setattr(sut, "SORT_MERGE_RUNS", 3)
+        assert list(sut.sort_by_external(rows, ["a", "b"], 7, tmp)) == expected
+    assert not list(sut.sort_by_external([], ["a"]))
+
+
+def test_uniq_by_key():
+    rows = [{"a": i % 7, "b": [i % 3]} for i in range(100)]
+    expected = sut.uniq_by(rows)
+    assert len(expected) == 21
+    for max_keys in (None, 100, 5, 0):
+        assert list(sut.uniq_by_key(rows, max_keys=max_keys)) == expected
+    actual = list(sut.uniq_by_key(rows, fields=["a"], max_keys=3))
+    assert actual == rows[:7]
+    shared = "x" * 10
+    rows = [{"x": shared, "y": shared}, {"x": "x" * 10, "y": "x" * 10}, 1, 1.0, True]
+    for max_keys in (None, 0):
+        assert list(sut.uniq_by_key(rows, max_keys=max_keys)) == rows[:1] + [1]
+    keys = [(1, "a", b"a", None), frozenset({2.5, "b"}), frozenset({"b", 2.5})]
+    assert len({sut.key_digest(key) for key in keys}) == 2
+    disk = sut.DiskHashSet()
+    assert disk.add(b"x") and not disk.add(b"x")
+    disk.update([b"x", b"y"])
+    assert b"y" in disk and b"z" not in disk and len(disk) == 2
+    disk.close()
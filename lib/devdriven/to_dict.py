@@ -1,73 +1,177 @@
-from typing import Any
+from typing import Any, Callable, Dict, IO, List, Set, Tuple
 import json
+import io
+import itertools
+import types
+import weakref
 import subprocess
 import re
 import dataclasses
-import inspect
 from datetime import datetime, timezone
 from pathlib import Path
-from .util import maybe_decode_bytes, datetime_iso8601
+from .util import maybe_decode_bytes, datetime_iso8601, TypeDispatch
+
+
+# ToJSON.walk: the value has been written.
+WRITTEN = object()
+# ToDict.memoize: the object is being walked.
+WALKING = object()
+# Walked as lists: iterators are consumed.
+ITERATOR_TYPES: Tuple[type, ...] = (
+    types.GeneratorType,
+    map,
+    filter,
+    zip,
+    enumerate,
+    reversed,
+    itertools.chain,
+    itertools.islice,
+    type(iter([])),
+    type(iter(())),
+    type(iter(range(0))),
+    type({}.items()),
+    type({}.keys()),
+    type({}.values()),
+)
 
 
 class ToDict:
+    """
+    Converts objects to JSON-able data.
+    Handlers are found by type: see ToDict.register.
+    """
+
     tz = timezone.utc
+    walkers: "ToDictWalkers"
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.walkers = ToDictWalkers(owner=cls, parent=cls.walkers)
+
+    def __init__(self) -> None:
+        # id(obj) -> (obj, walked): obj is kept alive so its id is not reused.
+        # Only during a walk: see memoize.
+        self.memo: Dict[int, Tuple[Any, Any]] | None = None
+        # Walking the fields of a dataclass: see walk_dataclass.
+        self.in_dataclass = False
 
     def __call__(self, data: Any) -> Any:
         return self.walk(data)
 
     def walk(self, obj: Any) -> Any:
-        if obj is None:
-            return None
-        if callable(
-            getattr(obj, "to_dict", None)
-        ):  # https://stackoverflow.com/a/54625079
+        return self.walkers.find(type(obj))(self, obj)
+
+    @classmethod
+    def register(cls, typ: type, walker: Callable | None = None) -> Any:
+        """
+        Registers walker(self, obj) for instances of typ and its subclasses.
+        As a decorator: @ToDict.register(typ).
+        Registering on a class applies to its subclasses, e.g. ToJSON,
+        unless they register typ themselves.
+        """
+        return cls.walkers.register(typ, walker)
+
+    def walk_none(self, _obj: Any) -> Any:
+        return None
+
+    def walk_scalar(self, obj: Any) -> Any:
+        return obj
+
+    def walk_repr(self, obj: Any) -> Any:
+        return repr(obj)
+
+    def walk_to_dict(self, obj: Any) -> Any:
+        return self.memoize(obj, self.convert_to_dict)
+
+    def convert_to_dict(self, obj: Any) -> Any:
+        # https://stackoverflow.com/a/54625079
+        in_dataclass, self.in_dataclass = self.in_dataclass, False
+        try:
+            return self.walk(obj.to_dict())
+        # pylint: disable-next=broad-except
+        except Exception as _exc:
+            return f"<< {repr(obj)} >>"
+        finally:
+            self.in_dataclass = in_dataclass
+
+    def walk_bytes(self, obj: Any) -> Any:
+        decoded = maybe_decode_bytes(obj)
+        if decoded:
+            return f"<BYTES[{len(obj)}]:{decoded}>"
+        return f"<BYTES[{len(obj)}]>"
+
+    def memoize(self, obj: Any, walk: Callable) -> Any:
+        """
+        Returns walk(obj) once for each object: shared references share the result.
+        An object reached while walking itself is a cycle.
+        The outermost call owns the memo: it is dropped when that walk ends.
+        """
+        memo = self.memo
+        if memo is None:
+            self.memo = {}
             try:
-                return self.walk(obj.to_dict())
-            # pylint: disable-next=broad-except
-            except Exception as _exc:
-                # print(repr(type(obj)))
-                # print(repr(obj))
-                return f"<< {repr(obj)} >>"
-                # raise _exc
-        obj_type = type(obj)
-        is_numeric = (
-            issubclass(obj_type, int)
-            or issubclass(obj_type, float)
-            or issubclass(obj_type, str)
+                return self.memoize(obj, walk)
+            finally:
+                self.memo = None
+        key = id(obj)
+        if key in memo:
+            walked = memo[key][1]
+            return self.cycle(obj) if walked is WALKING else walked
+        memo[key] = (obj, WALKING)
+        try:
+            walked = walk(obj)
+        except BaseException:
+            del memo[key]
+            raise
+        memo[key] = (obj, walked)
+        return walked
+
+    def cycle(self, obj: Any) -> Any:
+        return f"<CYCLE:{type(obj).__name__}>"
+
+    def walk_dict(self, obj: Any) -> Any:
+        return self.memoize(obj, self.convert_dict)
+
+    def walk_list(self, obj: Any) -> Any:
+        return self.memoize(obj, self.convert_list)
+
+    def walk_dataclass(self, obj: Any) -> Any:
+        """
+        As {"class": ..., "fields": dataclasses.asdict(obj)}:
+        dataclasses within fields are walked as plain dicts of their fields.
+        """
+        if self.in_dataclass:
+            return self.memoize(obj, self.convert_dataclass)
+        return self.convert_dict({"class": type(obj), "fields": DataclassFields(obj)})
+
+    def walk_dataclass_fields(self, fields: "DataclassFields") -> Any:
+        in_dataclass, self.in_dataclass = self.in_dataclass, True
+        try:
+            return self.memoize(fields.obj, self.convert_dataclass)
+        finally:
+            self.in_dataclass = in_dataclass
+
+    def convert_dict(self, obj: Any) -> Any:
+        walk = self.walk
+        return {walk(key): walk(val) for key, val in obj.items()}
+
+    def convert_list(self, obj: Any) -> Any:
+        walk = self.walk
+        return [walk(elem) for elem in obj]
+
+    def convert_dataclass(self, obj: Any) -> Any:
+        return self.convert_dict(
+            {name: getattr(obj, name) for name in dataclass_fields(type(obj))}
         )
-        if is_numeric:
-            return obj
-        if issubclass(obj_type, bytes):
-            decoded = maybe_decode_bytes(obj)
-            if decoded:
-                return f"<BYTES[{len(obj)}]:{decoded}>"
-            return f"<BYTES[{len(obj)}]>"
-        if issubclass(obj_type, dict):
-            walked = {}
-            for key, val in obj.items():
-                walked[self.walk(key)] = self.walk(val)
-            return walked
-        if is_dataclass_instance(obj):
-            rep = {
-                "class": obj_type,
-                "fields": dataclasses.asdict(obj),
-            }
-            return self.walk(rep)
-        if inspect.isclass(obj):
-            return repr(obj)
-        if issubclass(obj_type, list) or issubclass(obj_type, tuple):
-            return [self.walk(elem) for elem in obj]
-        if issubclass(obj_type, re.Pattern):
-            return repr(obj)
-        if issubclass(obj_type, Path):
-            return repr(obj)
-        if issubclass(obj_type, datetime):
-            return datetime_iso8601(obj.astimezone(self.tz))
-        if issubclass(obj_type, subprocess.CompletedProcess):
-            return self.walk(vars(obj))
-        if issubclass(obj_type, BaseException):
-            return self.walk_exception(obj)
-        return {"class": obj_type.__name__, "repr": repr(obj)}
+
+    def walk_datetime(self, obj: Any) -> Any:
+        return datetime_iso8601(obj.astimezone(self.tz))
+
+    def walk_vars(self, obj: Any) -> Any:
+        return self.walk(vars(obj))
+
+    def walk_object(self, obj: Any) -> Any:
+        return {"class": type(obj).__name__, "repr": repr(obj)}
 
     def walk_exception(self, obj: Any) -> Any:
         obj_type = type(obj)
@@ -90,16 +194,230 @@ class ToDict:
                 "filename": obj.filename,
                 "filename2": obj.filename2,
             }
-            return self.walk(attrs) | vars(obj)
+            return self.walk(attrs | vars(obj))
         return self.walk({"class": obj_type.__name__, "message": str(obj)} | vars(obj))
 
 
+class DataclassFields:
+    "The fields of a dataclass instance: see ToDict.walk_dataclass."
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj: Any):
+        self.obj = obj
+
+
+class ToDictWalkers(TypeDispatch):
+    """
+    Types without a registered walker:
+    those with a to_dict method use it, dataclasses are walked by fields.
+    """
+
+    def __init__(
+        self,
+        registry: Any = None,
+        default: Any = None,
+        owner: Any = None,
+        parent: "ToDictWalkers | None" = None,
+    ):
+        super().__init__(registry, default)
+        # A subclass of ToDict chains to the walkers of its superclass:
+        self.owner = owner or ToDict
+        self.parent = parent
+        self.children: weakref.WeakSet = weakref.WeakSet()
+        if parent:
+            parent.children.add(self)
+
+    def resolve(self, typ: type) -> Any:
+        walker = self.resolve_in(self.chain_registry(), typ)
+        if walker is None or walker is self.default:
+            if callable(getattr(typ, "to_dict", None)):
+                return self.owner.walk_to_dict
+            if dataclasses.is_dataclass(typ):
+                return self.owner.walk_dataclass
+            walker = self.chain_default()
+        return self.bind(walker)
+
+    def bind(self, walker: Any) -> Any:
+        "walk_* methods resolve to the overrides of owner."
+        name = getattr(walker, "__name__", "")
+        if name.startswith("walk_"):
+            return getattr(self.owner, name, walker)
+        return walker
+
+    def chain_registry(self) -> Dict[type, Any]:
+        if self.parent is None:
+            return self.registry
+        return self.parent.chain_registry() | self.registry
+
+    def chain_default(self) -> Any:
+        if self.default is None and self.parent is not None:
+            return self.parent.chain_default()
+        return self.default
+
+    def register(self, typ: type, value: Any = None) -> Any:
+        if value is None:
+            return lambda value: self.register(typ, value)
+        super().register(typ, value)
+        self.clear_children()
+        return value
+
+    def clear_children(self) -> None:
+        for child in list(self.children):
+            child.cache.clear()
+            child.clear_children()
+
+
+ToDict.walkers = ToDictWalkers(
+    {
+        type(None): ToDict.walk_none,
+        int: ToDict.walk_scalar,
+        float: ToDict.walk_scalar,
+        str: ToDict.walk_scalar,
+        bytes: ToDict.walk_bytes,
+        dict: ToDict.walk_dict,
+        type: ToDict.walk_repr,
+        list: ToDict.walk_list,
+        tuple: ToDict.walk_list,
+        **{typ: ToDict.walk_list for typ in ITERATOR_TYPES},
+        re.Pattern: ToDict.walk_repr,
+        Path: ToDict.walk_repr,
+        datetime: ToDict.walk_datetime,
+        subprocess.CompletedProcess: ToDict.walk_vars,
+        BaseException: ToDict.walk_exception,
+        DataclassFields: ToDict.walk_dataclass_fields,
+    },
+    ToDict.walk_object,
+)
+
+
+class ToJSON(ToDict):
+    """
+    Writes JSON for objects to a stream, by the same rules as ToDict,
+    without building the converted tree, except for to_dict results:
+    see convert_to_dict.
+    Iterators and generators are written as arrays as they are consumed.
+    For acyclic objects, output is the same as
+    json.dump(to_dict(obj), fp, indent=indent).
+    Cycles differ: shared references are written again, see memoize,
+    where ToDict reuses the result, which may hold a <CYCLE:...> marker.
+    """
+
+    def __init__(self, fp: IO, indent: int | None = None):
+        super().__init__()
+        self.walking: Set[int] = set()
+        self.write: Callable[[str], Any] = fp.write
+        self.indent = None if indent is None else " " * indent
+        self.level = 0
+        self.encode = json.JSONEncoder().encode
+
+    def walk(self, obj: Any) -> Any:
+        value = self.walkers.find(type(obj))(self, obj)
+        if value is WRITTEN:
+            pass
+        elif isinstance(value, (dict, list)):
+            self.walk(value)
+        else:
+            self.write(self.encode(value))
+        return WRITTEN
+
+    def convert_to_dict(self, obj: Any) -> Any:
+        """
+        Buffers the output for obj.to_dict(): if walking fails, nothing is written.
+        The buffer is text for a tree obj.to_dict() already built in memory.
+        """
+        write, level, in_dataclass = self.write, self.level, self.in_dataclass
+        parts: List[str] = []
+        self.write, self.in_dataclass = parts.append, False
+        try:
+            self.walk(obj.to_dict())
+        # pylint: disable-next=broad-except
+        except Exception as _exc:
+            return f"<< {repr(obj)} >>"
+        finally:
+            self.write, self.level, self.in_dataclass = write, level, in_dataclass
+        write("".join(parts))
+        return WRITTEN
+
+    def memoize(self, obj: Any, walk: Callable) -> Any:
+        "Detects cycles only: shared references are written again."
+        key = id(obj)
+        if key in self.walking:
+            return self.cycle(obj)
+        self.walking.add(key)
+        try:
+            return walk(obj)
+        finally:
+            self.walking.discard(key)
+
+    def convert_dict(self, obj: Any) -> Any:
+        self.write_items(obj.items(), "{", "}")
+        return WRITTEN
+
+    def convert_list(self, obj: Any) -> Any:
+        self.write_items(obj, "[", "]")
+        return WRITTEN
+
+    def write_items(self, items: Any, start: str, end: str) -> None:
+        write, walk, indent = self.write, self.walk, self.indent
+        if indent is None:
+            first, sep, last = "", ", ", ""
+        else:
+            self.level += 1
+            first = "\n" + indent * self.level
+            sep = "," + first
+            last = "\n" + indent * (self.level - 1)
+        write(start)
+        empty = True
+        for item in items:
+            write(sep if not empty else first)
+            empty = False
+            if end == "}":
+                write(self.key(item[0]))
+                write(": ")
+                walk(item[1])
+            else:
+                walk(item)
+        if indent is not None:
+            self.level -= 1
+        write(end if empty else last + end)
+
+    def key(self, key: Any) -> str:
+        "Converts key by json.dumps rules for dict keys."
+        key = to_dict(key)
+        if isinstance(key, str):
+            return self.encode(key)
+        if key is None or isinstance(key, (bool, int, float)):
+            return self.encode(self.encode(key))
+        raise TypeError(
+            f"keys must be str, int, float, bool or None, not {type(key).__name__}"
+        )
+
+
+DATACLASS_FIELDS: Dict[type, Tuple[str, ...]] = {}
+
+
+def dataclass_fields(typ: type) -> Tuple[str, ...]:
+    names = DATACLASS_FIELDS.get(typ)
+    if names is None:
+        names = DATACLASS_FIELDS[typ] = tuple(
+            field.name for field in dataclasses.fields(typ)
+        )
+    return names
+
+
 def to_dict(data: Any) -> Any:
     return ToDict().walk(data)
 
 
+def write_json(obj: Any, fp: IO, indent: int | None = None) -> None:
+    ToJSON(fp, indent).walk(obj)
+
+
 def dump_json(obj: Any, indent: int | None = None) -> str:
-    return json.dumps(to_dict(obj), indent=indent)
+    out = io.StringIO()
+    write_json(obj, out, indent)
+    return out.getvalue()
 
 
 def is_dataclass_instance(obj: Any) -> bool:
@@ -1,6 +1,8 @@
 import re
 import subprocess
+import json
 from datetime import datetime, timezone
+import dataclasses
 from dataclasses import dataclass
 import pytest
 from . import to_dict
@@ -38,6 +40,24 @@ def test_dump_json():
     assert actual == expected
 
 
+def test_dump_json_streaming():
+    fut = to_dict.dump_json
+    data = {
+        "a": [1, 2.5, None, True, "é", b"xyz", {}, [], {"b": ()}],
+        1: re.compile("x"),
+        None: Exception("E"),
+        "d": {1, 2},
+    }
+    for indent in (None, 0, 2):
+        assert fut(data, indent) == json.dumps(to_dict.to_dict(data), indent=indent)
+    assert fut({"g": (i * i for i in range(3)), "m": map(str, [1, 2])}) == (
+        '{"g": [0, 1, 4], "m": ["1", "2"]}'
+    )
+    assert to_dict.to_dict(iter([1, b"x"])) == [1, "<BYTES[1]:x>"]
+    with pytest.raises(TypeError):
+        fut({(1, 2): 3})
+
+
 def test_walk_oserror():
     fut = to_dict.to_dict
     with pytest.raises(OSError) as exc_info:
@@ -95,3 +115,134 @@ def test_walk_dataclass():
 class ExampleDataclass:
     name: str
     value: int
+
+
+def test_register():
+    class Point:
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+
+    class MyToDict(to_dict.ToDict):
+        pass
+
+    MyToDict.register(Point, lambda self, obj: self.walk([obj.x, obj.y]))
+    assert MyToDict()({"p": Point(1, b"2")}) == {"p": [1, "<BYTES[1]:2>"]}
+    assert to_dict.to_dict(Point(1, 2))["class"] == "Point"
+
+
+def test_register_after_subclass():
+    class Money:
+        def __init__(self, cents):
+            self.cents = cents
+
+        def to_dict(self):
+            return {"dollars": self.cents / 100}
+
+    class BaseToDict(to_dict.ToDict):
+        pass
+
+    class SubToDict(BaseToDict):
+        pass
+
+    assert SubToDict()([Money(5)]) == [{"dollars": 0.05}]
+    BaseToDict.register(Money, lambda self, obj: {"cents": obj.cents})
+    assert SubToDict()([Money(5)]) == [{"cents": 5}]
+    assert to_dict.to_dict([Money(5)]) == [{"dollars": 0.05}]
+    assert to_dict.dump_json([Money(5)]) == '[{"dollars": 0.05}]'
+
+
+def test_dump_json_to_dict_error():
+    class Broken:
+        def to_dict(self):
+            return {"a": [1, self]}
+
+        def __repr__(self):
+            return "Broken()"
+
+    class Failing:
+        def to_dict(self):
+            return {"a": [1, FailingValue()]}
+
+        def __repr__(self):
+            return "Failing()"
+
+    class FailingValue:
+        def to_dict(self):
+            raise ValueError("to_dict")
+
+        def __repr__(self):
+            raise ValueError("repr")
+
+    assert to_dict.to_dict(Broken()) == {"a": [1, "<CYCLE:Broken>"]}
+    assert to_dict.dump_json([Failing()], 2) == '[\n  "<< Failing() >>"\n]'
+    assert to_dict.to_dict([Failing()]) == ["<< Failing() >>"]
+
+
+def test_walk_shared_and_cycles():
+    fut = to_dict.to_dict
+    shared = [b"x"]
+    actual = fut([shared, shared])
+    assert actual == [["<BYTES[1]:x>"], ["<BYTES[1]:x>"]]
+    assert actual[0] is actual[1]
+    cyclic: dict = {"a": 1}
+    cyclic["self"] = cyclic
+    assert fut(cyclic) == {"a": 1, "self": "<CYCLE:dict>"}
+    assert to_dict.dump_json(cyclic) == '{"a": 1, "self": "<CYCLE:dict>"}'
+    assert to_dict.dump_json([shared, shared]) == '[["<BYTES[1]:x>"], ["<BYTES[1]:x>"]]'
+    node = ExampleDataclass("node", 0)
+    node.value = [node]  # type: ignore
+    assert fut(node)["fields"] == {
+        "name": "node",
+        "value": ["<CYCLE:ExampleDataclass>"],
+    }
+
+
+def test_walk_reused_instance():
+    sut = to_dict.ToDict()
+    data = [1]
+    assert sut(data) == [1]
+    assert sut.memo is None
+    data.append(2)
+    assert sut(data) == [1, 2]
+    assert sut([data, data]) == [[1, 2], [1, 2]]
+    assert sut.memo is None
+
+
+@dataclass
+class ExampleOuter:
+    inner: ExampleDataclass
+    items: list
+    mapping: dict
+
+
+def test_walk_nested_dataclass():
+    inner = ExampleDataclass("inner", 1)
+    outer = ExampleOuter(inner, [inner, ExampleDataclass("item", 2)], {"k": (inner,)})
+    actual = to_dict.to_dict(outer)
+    assert list(actual) == ["class", "fields"]
+    assert re.search(r"<class '.*\.ExampleOuter'>", actual["class"])
+    expected = dataclasses.asdict(outer)
+    expected["mapping"]["k"] = list(expected["mapping"]["k"])
+    assert actual["fields"] == expected
+    assert to_dict.to_dict([inner])[0]["fields"] == {"name": "inner", "value": 1}
+    assert to_dict.dump_json(outer, 2) == json.dumps(actual, indent=2)
+
+
+def test_dump_json_shared_in_cycle():
+    parent: dict = {"name": "parent"}
+    children = [parent]
+    parent["children"] = children
+    data = [parent, children]
+    assert to_dict.to_dict(data) == [
+        {"name": "parent", "children": ["<CYCLE:dict>"]},
+        ["<CYCLE:dict>"],
+    ]
+    assert json.loads(to_dict.dump_json(data)) == [
+        {"name": "parent", "children": ["<CYCLE:dict>"]},
+        [{"name": "parent", "children": "<CYCLE:list>"}],
+    ]
+    acyclic = {"a": [1], "b": None}
+    acyclic["b"] = acyclic["a"]
+    assert to_dict.dump_json([acyclic, acyclic], 2) == json.dumps(
+        to_dict.to_dict([acyclic, acyclic]), indent=2
+    )
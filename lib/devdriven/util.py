@@ -1,4 +1,16 @@
-from typing import Any, Union, Iterable, Callable, Generator, List, Mapping, Dict, Tuple
+from typing import (
+    Any,
+    Union,
+    Iterable,
+    Callable,
+    Generator,
+    Iterator,
+    List,
+    Mapping,
+    Dict,
+    Tuple,
+    IO,
+)
 import os
 import subprocess
 import logging
@@ -11,10 +23,21 @@ import dataclasses
 import math
 import operator
 import traceback
+import threading
+import tempfile
+import functools
+from abc import ABCMeta
+import itertools
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+    as_completed,
+)
 from pathlib import Path
 from datetime import datetime, timezone
 from contextlib import contextmanager
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from icecream import ic
 
 Indexable = Union[list, tuple, dict, Mapping]  # ???: is there a type for this?
@@ -119,6 +142,38 @@ def splitkeep(s, delimiter):
     return datums
 
 
+def isplitkeep(s, delimiter) -> Iterator:
+    "Like splitkeep, but yields each datum as it is found."
+    if not delimiter:
+        raise ValueError("isplitkeep: empty delimiter")
+    start, end, width = 0, len(s), len(delimiter)
+    while start < end:
+        found = s.find(delimiter, start)
+        if found < 0:
+            yield s[start:]
+            return
+        yield s[start : found + width]
+        start = found + width
+
+
+def isplitkeep_view(data, delimiter: bytes) -> Iterator[memoryview]:
+    """
+    Like isplitkeep, but yields memoryview slices of data without copying.
+    data must support find and the buffer protocol: e.g. bytes, bytearray or mmap.
+    """
+    if not delimiter:
+        raise ValueError("isplitkeep_view: empty delimiter")
+    view = memoryview(data)
+    start, end, width = 0, len(data), len(delimiter)
+    while start < end:
+        found = data.find(delimiter, start)
+        if found < 0:
+            yield view[start:]
+            return
+        yield view[start : found + width]
+        start = found + width
+
+
 def humanize(
     num: float, precision: int = 2, radix: int = 1000, unit: str = ""
 ) -> Tuple[str, str]:
@@ -237,6 +292,32 @@ def exec_command(cmd_line: List[str], **options: Any) -> SubprocessResult:
     return result
 
 
+def exec_pipe(cmd_line: List[str], consume: Callable[[IO[bytes]], Any]) -> int:
+    """
+    Runs cmd_line, passing its stdout stream to consume(stdout) as it runs.
+    Returns the exit code.
+    Raises if cmd_line wrote anything to stderr.
+    """
+    msg = f"exec_pipe : {repr(cmd_line)} : ..."
+    logging.info("%s", msg)
+    time_0 = time.time()
+    with tempfile.TemporaryFile() as stderr:
+        with subprocess.Popen(cmd_line, stdout=subprocess.PIPE, stderr=stderr) as proc:
+            assert proc.stdout
+            consume(proc.stdout)
+        stderr.seek(0)
+        errors = stderr.read(4096)
+    dt_ms = (time.time() - time_0) * 1000
+    logging.info("%s", f"{msg} : returncode {proc.returncode} : elapsed_ms {dt_ms:.3f}")
+    if errors:
+        raise Exception(
+            f"exec_pipe: failed : {proc.returncode}"
+            f": {cmd_line!r} : "
+            f"{errors.decode(errors='replace').splitlines()[:5]!r}"
+        )
+    return proc.returncode
+
+
 def exec_command_unless_dry_run(
     cmd_line: List[str], dry_run: bool, **options: Any
 ) -> SubprocessResult | None:
@@ -376,6 +457,14 @@ def chunks(items, width: int) -> Iterable[Iterable]:
     return [items[i : i + width] for i in range(0, len(items), width)]
 
 
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    "Like chunks, but for any iterable: yields lists of up to size items."
+    size = max(1, size)
+    items = iter(items)
+    while batch := list(itertools.islice(items, size)):
+        yield batch
+
+
 def uniq_by(seq: Iterable[Any], key: Func1) -> Iterable[Any]:
     result, seen = [], set()
     for elem in seq:
@@ -434,6 +523,29 @@ def pairs(items: Iterable, inclusive: bool = False) -> Iterable[Tuple[Any, Any]]
     return list(pairs_generator(items, inclusive))
 
 
+#####################################################################
+# Concurrency
+
+
+Job = Tuple[Any, Tuple]
+
+
+def run_many(
+    jobs: Iterable[Job], workers: int | None = None, processes: bool = False
+) -> Iterator[Tuple[Any, Any]]:
+    """
+    For each (key, (func, *args)) in jobs, yields (key, func(*args)) as it completes.
+    """
+    executor_class: Callable = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    executor = executor_class(max_workers=workers)
+    try:
+        futures = {executor.submit(*job): key for key, job in jobs}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
 #####################################################################
 # Range
 
@@ -519,19 +631,215 @@ def host_short(host):
 
 
 #####################################################################
-# Misc
+# Memoization
 
 
-def memoize(f: Callable[[Any], Any]) -> Callable[[Any], Any]:
-    memo: Dict[Any, Any] = {}
+class Memoize:
+    """
+    Memoizes func(*args, **kwargs) by the structure of its arguments,
+    or by key(*args, **kwargs).
+    Entries beyond maxsize are evicted least-recently-used.
+    Entries older than ttl seconds are evicted on access.
+    Concurrent calls for the same key wait for a single evaluation.
+    Calls with arguments that have no hashable_key are not cached.
+    A recursive call with the same key raises RecursionError.
+    """
 
-    def g(x):
-        if x in memo:
-            return memo[x]
-        result = memo[x] = f(x)
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        func: FuncAny,
+        maxsize: int | None = None,
+        ttl: float | None = None,
+        key: FuncAny | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        assert maxsize is None or maxsize > 0
+        self.func = func
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.key = key
+        self.clock = clock
+        self.hits = self.misses = self.evictions = 0
+        self._memo: OrderedDict[Any, Tuple[Any, float]] = OrderedDict()
+        # key -> (Future, ident of the evaluating thread)
+        self._pending: Dict[Any, Tuple[Future, int]] = {}
+        self._lock = threading.Lock()
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        try:
+            key = self.key(*args, **kwargs) if self.key else memo_key(args, kwargs)
+        except TypeError:
+            with self._lock:
+                self.misses += 1
+            return self.func(*args, **kwargs)
+        with self._lock:
+            if (entry := self._lookup(key)) is not None:
+                self.hits += 1
+                return entry[0]
+            if pending := self._pending.get(key):
+                if pending[1] == threading.get_ident():
+                    raise RecursionError(
+                        f"{self.func.__qualname__}: recursive call with the same arguments"
+                    )
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._pending[key] = (Future(), threading.get_ident())
+        if pending:
+            return pending[0].result()
+        return self._evaluate(key, args, kwargs)
+
+    def __get__(self, obj: Any, _objtype: Any = None) -> Any:
+        if obj is None:
+            return self
+        return functools.partial(self, obj)
+
+    def _evaluate(self, key: Any, args: tuple, kwargs: dict) -> Any:
+        try:
+            result = self.func(*args, **kwargs)
+        except BaseException as exc:
+            with self._lock:
+                pending = self._pending.pop(key)[0]
+            pending.set_exception(exc)
+            raise
+        with self._lock:
+            pending = self._pending.pop(key)[0]
+            self._store(key, result)
+        pending.set_result(result)
         return result
 
-    return g
+    def _lookup(self, key: Any) -> Tuple[Any, float] | None:
+        entry = self._memo.get(key)
+        if entry is None:
+            return None
+        if self.ttl is not None and self.clock() - entry[1] >= self.ttl:
+            del self._memo[key]
+            self.evictions += 1
+            return None
+        self._memo.move_to_end(key)
+        return entry
+
+    def _store(self, key: Any, result: Any) -> None:
+        self._memo[key] = (result, self.clock())
+        self._memo.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self._memo) > self.maxsize:
+                self._memo.popitem(last=False)
+                self.evictions += 1
+
+    def cache_info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._memo),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+def memoize(
+    func: FuncAny | None = None,
+    maxsize: int | None = None,
+    ttl: float | None = None,
+    key: FuncAny | None = None,
+) -> Any:
+    """
+    Decorator: @memoize or @memoize(maxsize=1000, ttl=60.0).
+    See Memoize.
+    """
+    if func is None:
+        return lambda func: Memoize(func, maxsize=maxsize, ttl=ttl, key=key)
+    return Memoize(func, maxsize=maxsize, ttl=ttl, key=key)
+
+
+def memo_key(args: tuple, kwargs: Mapping) -> Any:
+    if kwargs:
+        return (hashable_key(args), hashable_key(kwargs))
+    return hashable_key(args)
+
+
+def hashable_key(obj: Any) -> Any:
+    """
+    Returns a hashable key for obj that is equal for structurally equal objects.
+    Lists, tuples, dicts and sets are converted recursively.
+    Raises TypeError for other unhashable objects:
+    their ids can be reused once they are freed.
+    """
+    if obj is None or isinstance(obj, (str, bytes, int, float)):
+        return obj
+    if isinstance(obj, (list, tuple)):
+        return (type(obj), tuple(map(hashable_key, obj)))
+    if isinstance(obj, Mapping):
+        return (
+            dict,
+            frozenset((hashable_key(k), hashable_key(v)) for k, v in obj.items()),
+        )
+    if isinstance(obj, (set, frozenset)):
+        return (frozenset, frozenset(map(hashable_key, obj)))
+    hash(obj)
+    return obj
+
+
+#####################################################################
+# Type Dispatch
+
+
+class TypeDispatch:
+    """
+    Maps types to values, e.g. handlers.
+    A type resolves to the value of the first registered type in its __mro__,
+    then to the first registered ABC, in registration order, it is a subclass of.
+    Unlike functools.singledispatch, ABCs are not ranked against the MRO.
+    Resolutions are cached: one dict lookup per find.
+    """
+
+    def __init__(self, registry: Mapping[type, Any] | None = None, default: Any = None):
+        self.registry: Dict[type, Any] = dict(registry or {})
+        self.default = default
+        self.cache: Dict[type, Any] = {}
+
+    def find(self, typ: type) -> Any:
+        try:
+            return self.cache[typ]
+        except KeyError:
+            value = self.cache[typ] = self.resolve(typ)
+            return value
+
+    def resolve(self, typ: type) -> Any:
+        return self.resolve_in(self.registry, typ)
+
+    def resolve_in(self, registry: Mapping[type, Any], typ: type) -> Any:
+        for base in typ.__mro__:
+            if base in registry:
+                return registry[base]
+        for base, value in registry.items():
+            if isinstance(base, ABCMeta) and issubclass(typ, base):
+                return value
+        return self.default
+
+    def register(self, typ: type, value: Any = None) -> Any:
+        "As a decorator: @dispatch.register(typ)."
+        if value is None:
+            return lambda value: self.register(typ, value)
+        self.registry[typ] = value
+        self.cache.clear()
+        return value
+
+    def copy(self) -> "TypeDispatch":
+        return type(self)(self.registry, self.default)
+
+
+#####################################################################
+# Misc
 
 
 def not_implemented(*_args, **_kwargs) -> None:
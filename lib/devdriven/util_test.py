@@ -1,7 +1,10 @@
 import subprocess
+import threading
 import time
 import re
 import operator
+from collections.abc import Sequence
+import pytest
 from . import util  # type: ignore
 
 
@@ -157,6 +160,23 @@ def test_splitkeep():
     assert fut(b"abc||", b"|") == [b"abc|", b"|"]
 
 
+def test_isplitkeep():
+    for inp in ("", "abc", "abc|", "abc||", "|a||bc|d", "a<>b<", "<><>"):
+        for sep in ("|", "<>"):
+            expected = util.splitkeep(inp, sep)
+            assert list(util.isplitkeep(inp, sep)) == expected
+            inp_b, sep_b = inp.encode(), sep.encode()
+            expected = util.splitkeep(inp_b, sep_b)
+            assert list(util.isplitkeep(inp_b, sep_b)) == expected
+            views = list(util.isplitkeep_view(inp_b, sep_b))
+            assert all(isinstance(view, memoryview) for view in views)
+            assert [bytes(view) for view in views] == expected
+    data = bytearray(b"ab|c")
+    first = next(util.isplitkeep_view(data, b"|"))
+    data[0:1] = b"X"
+    assert bytes(first) == b"Xb|"
+
+
 ##########################################################
 
 
@@ -345,3 +365,145 @@ def test_not_implemented():
         util.not_implemented()
     except NotImplementedError as exc:
         assert repr(exc) == "NotImplementedError('test_not_implemented')"
+
+
+##########################################################
+
+
+def test_memoize():
+    calls = []
+
+    @util.memoize
+    def fut(*args, **kwargs):
+        calls.append((args, kwargs))
+        return len(calls)
+
+    assert fut(1) == 1
+    assert fut(1) == 1
+    assert fut(1, b=2) == 2
+    assert fut(1, b=2) == 2
+    assert fut([1, {"a": [2]}]) == 3
+    assert fut([1, {"a": [2]}]) == 3
+    assert fut((1, {"a": [2]})) == 4
+    assert fut.__name__ == "fut"
+    assert fut.cache_info() == {
+        "hits": 3,
+        "misses": 4,
+        "evictions": 0,
+        "size": 4,
+        "maxsize": None,
+        "ttl": None,
+    }
+
+
+def test_memoize_maxsize():
+    fut = util.memoize(lambda x: [x], maxsize=2)
+    a = fut(1)
+    fut(2)
+    assert fut(1) is a
+    fut(3)
+    assert fut(1) is a
+    assert fut.cache_info()["evictions"] == 1
+    assert fut.cache_info()["size"] == 2
+
+
+def test_memoize_ttl():
+    now = [0.0]
+    fut = util.Memoize(lambda x: [x], ttl=10, clock=lambda: now[0])
+    a = fut(1)
+    now[0] = 9.0
+    assert fut(1) is a
+    now[0] = 10.0
+    assert fut(1) is not a
+    assert fut.cache_info()["evictions"] == 1
+
+
+def test_memoize_concurrent():
+    calls = []
+
+    @util.memoize
+    def fut(x):
+        calls.append(x)
+        time.sleep(0.050)
+        return x * 2
+
+    threads = [threading.Thread(target=fut, args=(3,)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [3]
+    assert fut.cache_info()["misses"] == 1
+    assert fut.cache_info()["hits"] == 4
+
+
+def test_memoize_exception():
+    @util.memoize
+    def fut(x):
+        raise ValueError(x)
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="1"):
+            fut(1)
+    assert fut.cache_info()["size"] == 0
+
+
+def test_memoize_unhashable():
+    class Unhashable:
+        __hash__ = None  # type: ignore
+
+        def __init__(self, x):
+            self.x = x
+
+    fut = util.memoize(lambda obj: obj.x)
+    assert [fut(Unhashable(i)) for i in range(5)] == [0, 1, 2, 3, 4]
+    assert fut.cache_info()["size"] == 0
+    with pytest.raises(TypeError):
+        util.hashable_key([Unhashable(1)])
+
+
+def test_memoize_recursive():
+    @util.memoize
+    def fut(x):
+        return fut(x)
+
+    with pytest.raises(RecursionError, match="recursive call"):
+        fut(1)
+    assert fut.cache_info()["size"] == 0
+
+
+def test_hashable_key():
+    fut = util.hashable_key
+    assert fut(1) == 1
+    assert fut("a") == "a"
+    assert fut([1, 2]) != fut((1, 2))
+    assert fut({"a": 1, "b": [2]}) == fut({"b": [2], "a": 1})
+    assert hash(fut({"a": 1, "b": [2]})) == hash(fut({"b": [2], "a": 1}))
+
+
+def test_memoize_key():
+    fut = util.memoize(lambda x, y: [x, y], key=lambda x, _y: x)
+    assert fut(1, 2) == [1, 2]
+    assert fut(1, 3) == [1, 2]
+    assert fut(2, 3) == [2, 3]
+
+
+def test_type_dispatch():
+    obj = util.TypeDispatch({int: "int", object: "object"}, "default")
+    assert obj.find(bool) == "int"
+    assert obj.find(str) == "object"
+    assert bool in obj.cache
+    obj.register(Sequence, "sequence")
+    assert not obj.cache
+    assert obj.find(list) == "object"
+    del obj.registry[object]
+    assert obj.find(list) == "object"
+    obj.cache.clear()
+    assert obj.find(list) == "sequence"
+    assert obj.find(dict) == "default"
+
+    @obj.register(str)
+    def str_handler():
+        pass
+
+    assert obj.copy().find(str) is str_handler